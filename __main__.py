@@ -1,4 +1,5 @@
+import sys
 from main import run
 
 if __name__ == "__main__":
-    run()
+    sys.exit(run())
@@ -0,0 +1,93 @@
+"""
+Minimal Atlassian Document Format (ADF) builder.
+
+Nodes are plain dicts with only the keys ADF needs: no empty "attrs", and no
+empty text nodes (an empty cell is a bare paragraph). Header rows are built
+once per header tuple and shared between tables, so nothing here may mutate a
+node after it is returned.
+
+dumps_doc() serializes compactly with orjson when it is installed and falls
+back to the stdlib json module; either way the output for a given document is
+the same on every run, so it can be hashed.
+"""
+import json
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+STRONG = ({"type": "strong"},)
+EM = ({"type": "em"},)
+_TABLE_ATTRS = {"isNumberColumnEnabled": False, "layout": "default"}
+
+
+def text(value, marks=None):
+    node = {"type": "text", "text": value}
+    if marks:
+        node["marks"] = list(marks)
+    return node
+
+
+def paragraph(*nodes):
+    """Paragraph of text nodes (other values become plain text; empty ones are dropped)."""
+    content = [n if isinstance(n, dict) else text("" if n is None else str(n)) for n in nodes]
+    content = [n for n in content if n.get("text", True) != ""]
+    if not content:
+        return {"type": "paragraph"}
+    return {"type": "paragraph", "content": content}
+
+
+def heading(value, level=2):
+    return {"type": "heading", "attrs": {"level": level}, "content": [text(value)]}
+
+
+def labelled(label, value):
+    """Paragraph rendered as '**Label:** value'."""
+    return paragraph(text(f"{label}: ", STRONG), str(value))
+
+
+def link(value, href):
+    return text(value, ({"type": "link", "attrs": {"href": href}},))
+
+
+def bullet_list(items):
+    """Bullet list; each item is a paragraph node or anything paragraph() accepts."""
+    return {"type": "bulletList", "content": [
+        {"type": "listItem", "content": [i if isinstance(i, dict) and i.get("type") == "paragraph" else paragraph(i)]}
+        for i in items
+    ]}
+
+
+def _cell(kind, value):
+    return {"type": kind, "content": [paragraph(str(value))]}
+
+
+@lru_cache(maxsize=64)
+def header_row(headers):
+    """Shared (read-only) header row for a tuple of column names."""
+    return {"type": "tableRow", "content": [_cell("tableHeader", h) for h in headers]}
+
+
+def table(headers, rows):
+    content = [header_row(tuple(headers))]
+    content.extend(
+        {"type": "tableRow", "content": [_cell("tableCell", c) for c in row]}
+        for row in rows
+    )
+    return {"type": "table", "attrs": _TABLE_ATTRS, "content": content}
+
+
+def doc(blocks):
+    return {"type": "doc", "version": 1, "content": blocks}
+
+
+if orjson is not None:
+    def dumps_doc(document):
+        """Serialize an ADF document to a compact JSON string."""
+        return orjson.dumps(document).decode("utf-8")
+else:
+    def dumps_doc(document):
+        """Serialize an ADF document to a compact JSON string."""
+        return json.dumps(document, separators=(",", ":"), ensure_ascii=False)
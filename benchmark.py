@@ -0,0 +1,154 @@
+"""
+Benchmarks for the CPU-bound parts of the sync over the bundled flow corpus
+(sf_project/force-app/main/default/flows) and synthetic object describes.
+
+    python benchmark.py                      # JSON report to stdout
+    python benchmark.py -n 5 -o bench.json   # 5 timed rounds, write to file
+
+Each benchmark reports items, throughput (items/s), p50/p95 per-item
+latency (ms) and peak traced memory (KB) so runs can be diffed over time.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from flow_parser import parse_flow_file
+from sf_loader import parse_flow_metadata
+from flow_confluence_client import FlowConfluenceUploader
+from object_uploader import ConfluenceObjectUploader
+import adf
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "sf_project", "force-app", "main", "default", "flows")
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run_benchmark(func, items, rounds):
+    """Time func(item) for every item over `rounds` passes, then trace one pass for memory."""
+    func(items[0])  # warm-up (imports, tag caches)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for item in items:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "items": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def synthetic_describe(rng, name, field_count, picklist_size=25):
+    """A describe shaped like object_loader.fetch_object_by_name output."""
+    types = ["string", "picklist", "reference", "double", "currency", "boolean", "textarea"]
+    fields = []
+    for i in range(field_count):
+        ftype = rng.choice(types)
+        field = {
+            "name": f"Field_{i}__c", "label": f"Field {i}", "type": ftype,
+            "length": rng.choice([0, 80, 255]), "precision": 18, "scale": 2,
+            "nillable": rng.random() > 0.2, "unique": rng.random() > 0.95,
+            "defaultValue": None, "inlineHelpText": f"Help for field {i}" if i % 3 == 0 else None,
+            "picklistValues": [], "referenceTo": [],
+        }
+        if ftype == "picklist":
+            field["picklistValues"] = [{"value": f"Option {j}"} for j in range(picklist_size)]
+        if ftype == "reference":
+            field["referenceTo"] = [rng.choice(["Account", "Contact", "User"])]
+        fields.append(field)
+    children = [
+        {"childSObject": f"Child_{i}__c", "field": f"{name}__c", "relationshipName": f"Children_{i}",
+         "cascadeDelete": i % 2 == 0, "restrictedDelete": False}
+        for i in range(field_count // 5)
+    ]
+    return {"name": name, "label": name, "custom": True, "keyPrefix": "a0X",
+            "fields": fields, "childRelationships": children, "description": ""}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--rounds", type=int, default=3, help="timed passes per benchmark")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="directory of .flow-meta.xml files")
+    parser.add_argument("--objects", default="50,200,600",
+                        help="comma-separated field counts for synthetic object describes")
+    args = parser.parse_args(argv)
+
+    flow_files = sorted(glob.glob(os.path.join(args.corpus, "*.flow-meta.xml")))
+    if not flow_files:
+        parser.error(f"no flow files found in {args.corpus}")
+    flows = [parse_flow_file(f) for f in flow_files]
+
+    rng = random.Random(42)
+    describes = [synthetic_describe(rng, f"Synthetic_{n}", int(n)) for n in args.objects.split(",")]
+
+    flow_uploader = FlowConfluenceUploader()
+    object_uploader = ConfluenceObjectUploader(client=None)
+
+    def build_object_doc(meta):
+        blocks = object_uploader._build_header_blocks(meta["name"], meta)
+        blocks += object_uploader._build_managed_blocks(meta["fields"], meta)
+        return adf.dumps_doc(adf.doc(blocks))
+
+    benchmarks = {
+        "parse_flow_file": (parse_flow_file, flow_files),
+        "sf_loader.parse_flow_metadata": (parse_flow_metadata, flow_files),
+        "flow._build_full_body": (flow_uploader._build_full_body, flows),
+        "flow._build_update_section": (flow_uploader._build_update_section, flows),
+        "object.adf_document": (build_object_doc, describes),
+    }
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rounds": args.rounds,
+        "corpus": {
+            "flows": len(flow_files),
+            "bytes": sum(os.path.getsize(f) for f in flow_files),
+            "object_field_counts": [len(d["fields"]) for d in describes],
+        },
+        "benchmarks": {},
+    }
+    for name, (func, items) in benchmarks.items():
+        report["benchmarks"][name] = run_benchmark(func, items, args.rounds)
+        print(f"{name}: {report['benchmarks'][name]}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
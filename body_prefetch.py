@@ -0,0 +1,145 @@
+import logging
+import threading
+from collections import OrderedDict
+import config
+from http_session import get_session
+
+logger = logging.getLogger(__name__)
+
+
+class BodyCache:
+    """Bounded LRU of page id -> v2 page (with body). Entries are handed out once."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max(1, max_entries)
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def put(self, page):
+        with self._lock:
+            self._pages[str(page["id"])] = page
+            self._pages.move_to_end(str(page["id"]))
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+                self.evicted += 1
+
+    def pop(self, page_id):
+        with self._lock:
+            return self._pages.pop(str(page_id), None)
+
+
+class BodyPrefetcher:
+    """
+    Pulls the bodies of the pages a run is about to update in bulk, with one
+    v2 `GET /pages?id=..&id=..&body-format=..` per batch instead of one GET per
+    page. Callers plan() page ids as their work items become known, in the
+    order they will be needed, and discard() the ones they end up skipping.
+    The first get() of a planned id fetches it together with the oldest
+    planned ids not fetched yet, so the cache only runs one batch ahead of the
+    workers. get() returns None for ids that weren't planned, were evicted or
+    failed to fetch - callers then fall back to their own GET.
+    """
+
+    def __init__(self, site_url, auth, body_format, session=None, batch_size=None, max_entries=None):
+        self.site_url = site_url.rstrip("/")
+        self.auth = auth
+        self.body_format = body_format
+        self.session = session or get_session()
+        self.batch_size = max(1, batch_size or config.BODY_PREFETCH_BATCH)
+        # At least one batch, or a batch would evict its own pages
+        self.cache = BodyCache(max(max_entries or config.BODY_CACHE_MAX_ENTRIES, self.batch_size))
+        self._pending = OrderedDict()  # planned, not fetched yet (work order)
+        self._planned = set()
+        self._fetch_lock = threading.Lock()  # one bulk fetch at a time
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, body_format, session=None):
+        return cls(
+            config.CONFLUENCE_BASE_URL,
+            (config.CONFLUENCE_EMAIL, config.CONFLUENCE_API_TOKEN),
+            body_format,
+            session=session,
+        )
+
+    def plan(self, page_ids):
+        """Queue page ids (in the order they will be needed) for prefetching."""
+        with self._lock:
+            for page_id in page_ids:
+                page_id = str(page_id)
+                if page_id and page_id not in self._planned:
+                    self._planned.add(page_id)
+                    self._pending[page_id] = None
+        return self
+
+    def discard(self, page_id):
+        """Drop a planned page the caller no longer needs (e.g. skipped as unchanged)."""
+        page_id = str(page_id)
+        with self._lock:
+            self._pending.pop(page_id, None)
+        self.cache.pop(page_id)
+
+    def get(self, page_id):
+        """The prefetched v2 page (id, title, version, body) or None."""
+        page_id = str(page_id)
+        page = self.cache.pop(page_id)
+        if page is None and page_id in self._planned:
+            with self._fetch_lock:
+                # Another worker may have fetched this batch while we waited
+                page = self.cache.pop(page_id)
+                batch = self._next_batch(page_id) if page is None else None
+                if batch:
+                    page = self._fetch(batch, page_id)
+        with self._lock:
+            if page is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return page
+
+    def _next_batch(self, page_id):
+        """page_id plus the oldest pending ids; empty if page_id was already fetched."""
+        with self._lock:
+            if page_id not in self._pending:
+                return []
+            del self._pending[page_id]
+            batch = [page_id]
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popitem(last=False)[0])
+        return batch
+
+    def _fetch(self, batch, page_id):
+        """Fetch a batch; returns page_id's page and caches the rest (None on failure)."""
+        wanted = None
+        url = f"{self.site_url}/wiki/api/v2/pages"
+        params = [("id", i) for i in batch] + [("body-format", self.body_format), ("limit", len(batch))]
+        while url:
+            r = self.session.get(url, params=params, auth=self.auth)
+            self.requests += 1
+            if r.status_code != 200:
+                logger.warning("⚠️ Body prefetch of %d pages failed: %s", len(batch), r.text)
+                return wanted
+            data = r.json()
+            for page in data.get("results", []):
+                if (page.get("body") or {}).get(self.body_format) is None:
+                    continue
+                # Handed straight back, so the rest of a large batch can't evict it
+                if str(page["id"]) == page_id:
+                    wanted = page
+                else:
+                    self.cache.put(page)
+            next_link = data.get("_links", {}).get("next")
+            url = f"{self.site_url}{next_link}" if next_link else None
+            params = None
+        return wanted
+
+    def log_stats(self):
+        if self.hits or self.misses:
+            logger.info(
+                "📦 Body prefetch: %d hits, %d misses, %d bulk requests, %d evicted",
+                self.hits, self.misses, self.requests, self.cache.evicted,
+            )
@@ -0,0 +1,40 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class CliExecutor:
+    """
+    Bounded parallel runner for Salesforce CLI commands.
+
+    Each loader keeps its own run_cli(cmd, timeout=...) for output parsing and
+    error logging; the executor only overlaps the (slow, Node-based) CLI
+    processes and hands results back in completion order.
+    """
+
+    def __init__(self, runner, workers=None, timeout=None):
+        self.runner = runner
+        self.workers = max(1, workers or config.SF_CLI_WORKERS)
+        self.timeout = timeout if timeout is not None else config.SF_CLI_TIMEOUT
+
+    def run(self, jobs):
+        """Run (key, cmd) jobs; yield (key, result) as each command finishes."""
+        jobs = list(jobs)
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs)),
+                                thread_name_prefix="sfcli") as pool:
+            futures = {
+                pool.submit(self.runner, cmd, timeout=self.timeout): key
+                for key, cmd in jobs
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    logger.exception("CLI job failed for %s", key)
+                    result = None
+                yield key, result
@@ -1,76 +1,266 @@
+"""
+Settings for the sync tools, resolved lazily.
+
+`config.NAME` reads the same as before, but importing this module does
+nothing: the first attribute access loads .env (once), then parses and
+validates every setting into a cached Settings object. Directories are only
+created when first needed (LOG_DIR when it is first read; STATE_DIR by
+whoever writes there). A bad value raises ConfigError naming the variable.
+"""
 import os
-from datetime import datetime
-from dotenv import load_dotenv
-import base64
+import threading
 from pathlib import Path
 
-# ─────────────────────────────
-# Load .env from the same directory as this file
-# ─────────────────────────────
-env_path = Path(__file__).resolve().parent / ".env"
-load_dotenv(dotenv_path=env_path)
-
-# ─────────────────────────────
-# Confluence Settings
-# ─────────────────────────────
-CONFLUENCE_DOMAIN = os.getenv("CONFLUENCE_DOMAIN", "")
-CONFLUENCE_EMAIL = os.getenv("CONFLUENCE_EMAIL", "")
-CONFLUENCE_API_TOKEN = os.getenv("CONFLUENCE_API_TOKEN", "")
-CONFLUENCE_BASE_URL = f"https://{CONFLUENCE_DOMAIN}" if CONFLUENCE_DOMAIN else None
-CONFLUENCE_SPACE_ID = os.getenv("CONFLUENCE_SPACE_ID", "")
-ADMIN_DOCS_PARENT_ID = os.getenv("ADMIN_DOCS_PARENT_ID", "")
-OBJECT_DOCS_PARENT_ID = os.getenv("OBJECT_DOCS_PARENT_ID", "")
-
-# Auth string for Confluence REST API
-if CONFLUENCE_EMAIL and CONFLUENCE_API_TOKEN:
-    CONFLUENCE_AUTH = base64.b64encode(
-        f"{CONFLUENCE_EMAIL}:{CONFLUENCE_API_TOKEN}".encode("utf-8")
-    ).decode("utf-8")
-else:
-    CONFLUENCE_AUTH = None
-
-# ─────────────────────────────
-# SQL Server
-# ─────────────────────────────
-SQL_DRIVER = os.getenv("SQL_DRIVER", "")
-SQL_SERVER = os.getenv("SQL_SERVER", "")
-SQL_DATABASE = os.getenv("SQL_DATABASE", "")
-SQL_USERNAME = os.getenv("SQL_USERNAME", "")
-SQL_PASSWORD = os.getenv("SQL_PASSWORD", "")
-SQL_QUERY = os.getenv("SQL_QUERY", "")
-
-# ─────────────────────────────
-# Salesforce CLI
-# ─────────────────────────────
-DATA_SOURCE = os.getenv("DATA_SOURCE", "SF_CLI")
-SF_CLI = os.getenv("SF_CLI", "sf")
-SF_ORG_ALIAS = os.getenv("SF_ORG_ALIAS", "")
-
-# ─────────────────────────────
-# Sync Mode (FLOWS, OBJECTS, BOTH)
-# ─────────────────────────────
-SYNC_MODE = os.getenv("SYNC_MODE", "BOTH").strip().upper()
-
-# ─────────────────────────────
-# Logging
-# ─────────────────────────────
-RUN_TS = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-RUN_TIMESTAMP = datetime.now().strftime("%Y-%m-%d %H:%M:%S")   # human-readable
-RUN_TS_SAFE = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
-
-# ─────────────────────────────
-# Debug Flag
-# ─────────────────────────────
-DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
-
-FLOW_FOLDER = os.getenv("FLOW_FOLDER")
-OBJECT_FOLDER = os.getenv("OBJECT_FOLDER")
-
-# ─────────────────────────────
-# Object Limiting (for troubleshooting)
-# ─────────────────────────────
-LIMIT_OBJECTS = os.getenv("LIMIT_OBJECTS", "false").lower() in ("1", "true", "yes")
-OBJECT_LIMIT = int(os.getenv("OBJECT_LIMIT", "10"))
+ENV_PATH = Path(__file__).resolve().parent / ".env"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_TRUE = ("1", "true", "yes")
+
+_settings = None
+_env_loaded = False
+_lock = threading.Lock()
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def load_env():
+    """Load .env from the same directory as this file (first call only)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=ENV_PATH)
+            _env_loaded = True
+
+
+def site_url(domain):
+    """Confluence site URL; an explicit http(s):// scheme is kept (e.g. a local stand-in)."""
+    if not domain:
+        return None
+    domain = domain.rstrip("/")
+    return domain if domain.startswith(("http://", "https://")) else f"https://{domain}"
+
+
+def _str(name, default=""):
+    return os.getenv(name, default)
+
+
+def _bool(name, default):
+    return os.getenv(name, default).strip().lower() in _TRUE
+
+
+def _number(kind, name, default, minimum=None):
+    raw = os.getenv(name, default)
+    try:
+        value = kind(raw)
+    except (TypeError, ValueError):
+        raise ConfigError(f"{name}={raw!r} is not a valid {kind.__name__}") from None
+    if minimum is not None and value < minimum:
+        raise ConfigError(f"{name}={raw!r} must be at least {minimum}")
+    return value
+
+
+def _int(name, default, minimum=None):
+    return _number(int, name, default, minimum)
+
+
+def _float(name, default, minimum=None):
+    return _number(float, name, default, minimum)
+
+
+def _choice(name, default, choices):
+    value = os.getenv(name, default).strip().upper()
+    if value not in choices:
+        raise ConfigError(f"{name}={value!r} must be one of {', '.join(choices)}")
+    return value
+
+
+class Settings:
+    def __init__(self):
+        # ─────────────────────────────
+        # Confluence Settings
+        # ─────────────────────────────
+        self.CONFLUENCE_DOMAIN = _str("CONFLUENCE_DOMAIN")
+        self.CONFLUENCE_EMAIL = _str("CONFLUENCE_EMAIL")
+        self.CONFLUENCE_API_TOKEN = _str("CONFLUENCE_API_TOKEN")
+        self.CONFLUENCE_BASE_URL = site_url(self.CONFLUENCE_DOMAIN)
+        self.CONFLUENCE_SPACE_ID = _str("CONFLUENCE_SPACE_ID")
+        self.ADMIN_DOCS_PARENT_ID = _str("ADMIN_DOCS_PARENT_ID")
+        self.OBJECT_DOCS_PARENT_ID = _str("OBJECT_DOCS_PARENT_ID")
+
+        # ─────────────────────────────
+        # HTTP connection pool (shared by all Confluence clients)
+        # ─────────────────────────────
+        self.HTTP_POOL_SIZE = _int("HTTP_POOL_SIZE", "10", minimum=1)
+        self.HTTP_POOL_CONNECTIONS = _int("HTTP_POOL_CONNECTIONS", "4", minimum=1)
+        self.HTTP_TIMEOUT = _float("HTTP_TIMEOUT", "60", minimum=0)
+
+        # Client-side throttling per host (requests/second, 0 = off) and retries.
+        # 429s are retried for every method; 5xx/connection errors only for
+        # idempotent ones. Retry-After / X-RateLimit-* headers take precedence over
+        # the jittered exponential backoff.
+        self.HTTP_RATE_LIMIT = _float("HTTP_RATE_LIMIT", "0", minimum=0)
+        self.HTTP_RATE_BURST = _int("HTTP_RATE_BURST", "10", minimum=1)
+        self.HTTP_MAX_RETRIES = _int("HTTP_MAX_RETRIES", "5", minimum=0)
+        self.HTTP_BACKOFF_BASE = _float("HTTP_BACKOFF_BASE", "0.5", minimum=0)
+        self.HTTP_BACKOFF_MAX = _float("HTTP_BACKOFF_MAX", "30", minimum=0)
+
+        # ─────────────────────────────
+        # SQL Server
+        # ─────────────────────────────
+        self.SQL_DRIVER = _str("SQL_DRIVER")
+        self.SQL_SERVER = _str("SQL_SERVER")
+        self.SQL_DATABASE = _str("SQL_DATABASE")
+        self.SQL_USERNAME = _str("SQL_USERNAME")
+        self.SQL_PASSWORD = _str("SQL_PASSWORD")
+        self.SQL_QUERY = _str("SQL_QUERY")
+
+        # ─────────────────────────────
+        # Salesforce CLI
+        # ─────────────────────────────
+        self.DATA_SOURCE = _str("DATA_SOURCE", "SF_CLI")
+        self.SF_CLI = _str("SF_CLI", "sf")
+        self.SF_ORG_ALIAS = _str("SF_ORG_ALIAS")
+        self.SF_CLI_WORKERS = _int("SF_CLI_WORKERS", "4", minimum=1)         # parallel CLI processes
+        self.SF_CLI_TIMEOUT = _float("SF_CLI_TIMEOUT", "300", minimum=0)     # seconds per command
+        self.SF_API_VERSION = _str("SF_API_VERSION", "61.0")
+        # CLI: one `sf sobject describe` per object; REST: Composite-batched describes
+        self.OBJECT_DESCRIBE_MODE = _choice("OBJECT_DESCRIBE_MODE", "CLI", ("CLI", "REST"))
+        # Only re-describe/upload objects whose metadata changed (uses the REST API)
+        self.INCREMENTAL_OBJECTS = _bool("INCREMENTAL_OBJECTS", "false")
+
+        # ─────────────────────────────
+        # Sync Mode (FLOWS, OBJECTS, BOTH)
+        # ─────────────────────────────
+        self.SYNC_MODE = _choice("SYNC_MODE", "BOTH", ("FLOWS", "OBJECTS", "BOTH"))
+
+        # ─────────────────────────────
+        # Logging
+        # ─────────────────────────────
+        from datetime import datetime
+        now = datetime.now()
+        self.RUN_TS = now.strftime("%Y-%m-%d %H:%M:%S")
+        self.RUN_TIMESTAMP = self.RUN_TS   # human-readable
+        self.RUN_TS_SAFE = now.strftime("%Y%m%d_%H%M%S")
+
+        self.LOG_DIR = os.path.join(BASE_DIR, "logs")  # created on first access
+
+        # Persistent run state (fingerprints, caches); created on first write
+        self.STATE_DIR = _str("STATE_DIR") or os.path.join(BASE_DIR, "state")
+
+        # Persistent DX project reused for metadata retrieves
+        self.DX_WORKSPACE_DIR = _str("DX_WORKSPACE_DIR") or os.path.join(self.STATE_DIR, "dx_workspace")
+        self.DX_LOCK_TIMEOUT = _float("DX_LOCK_TIMEOUT", "600", minimum=0)            # wait for another run
+        self.DX_LOCK_STALE_SECONDS = _float("DX_LOCK_STALE_SECONDS", "21600", minimum=0)  # if owner unprobeable
+        self.DX_TEMP_MAX_AGE_HOURS = _float("DX_TEMP_MAX_AGE_HOURS", "24", minimum=0)  # leaked sfproj_* dirs
+
+        # ─────────────────────────────
+        # Debug Flag
+        # ─────────────────────────────
+        self.DEBUG = _bool("DEBUG", "false")
+
+        self.FLOW_FOLDER = os.getenv("FLOW_FOLDER")
+        self.OBJECT_FOLDER = os.getenv("OBJECT_FOLDER")
+
+        # Build a title -> page index of the parent folders at startup instead of
+        # searching Confluence once per flow/object
+        self.PAGE_INDEX = _bool("PAGE_INDEX", "true")
+
+        # Number of flows parsed/uploaded concurrently by mainflow.py. Keep
+        # HTTP_POOL_SIZE at least this large so every worker has a pooled connection.
+        self.FLOW_UPLOAD_CONCURRENCY = _int("FLOW_UPLOAD_CONCURRENCY", "8")
+
+        # Only retrieve/upload flows whose ActiveVersion changed since the last run
+        self.INCREMENTAL_FLOWS = _bool("INCREMENTAL_FLOWS", "false")
+
+        # Object pages whose generated sections serialize larger than this (bytes)
+        # move Fields / Picklist Values / Child Relationships to child pages (0 = never)
+        self.OBJECT_PAGE_BUDGET = _int("OBJECT_PAGE_BUDGET", "1000000", minimum=0)
+
+        # Write a JSON performance report (phases, HTTP/CLI timings) to LOG_DIR per run
+        self.PERF_REPORT = _bool("PERF_REPORT", "true")
+
+        # cProfile + tracemalloc reports for a run in LOG_DIR (same as --profile)
+        self.PROFILE = _bool("PROFILE", "false")
+        self.PROFILE_TOP = _int("PROFILE_TOP", "30", minimum=1)
+        self.PROFILE_FRAMES = _int("PROFILE_FRAMES", "5", minimum=1)
+
+        # Delete labels that are no longer generated for a page (off by default:
+        # it also removes labels people added by hand)
+        self.LABEL_REMOVE_STALE = _bool("LABEL_REMOVE_STALE", "false")
+
+        # Read flows from this folder instead of retrieving them with the sf CLI
+        # (offline runs, e.g. LOCAL_FLOW_DIR=sf_project/force-app/main/default/flows)
+        self.LOCAL_FLOW_DIR = _str("LOCAL_FLOW_DIR")
+
+        # Parse flows on a process pool (0/1 = parse inside the upload workers)
+        self.FLOW_PARSE_WORKERS = _int("FLOW_PARSE_WORKERS", "0", minimum=0)
+        self.FLOW_PARSE_ORDERED = _bool("FLOW_PARSE_ORDERED", "true")
+
+        # Cache parsed flows by SHA-256 of their XML in STATE_DIR/flow_parse_cache.sqlite
+        self.FLOW_PARSE_CACHE = _bool("FLOW_PARSE_CACHE", "true")
+        self.FLOW_PARSE_CACHE_MAX_ENTRIES = _int("FLOW_PARSE_CACHE_MAX_ENTRIES", "5000", minimum=1)
+
+        # Journal each item's completed stages to STATE_DIR/<run>_journal.jsonl;
+        # RESUME (same as --resume) skips what an interrupted run already finished
+        self.RUN_JOURNAL = _bool("RUN_JOURNAL", "true")
+        self.RESUME = _bool("RESUME", "false")
+
+        # Fetch the bodies of pages about to be updated in bulk (v2 multi-id GET,
+        # BODY_PREFETCH_BATCH ids per request) into a bounded in-memory cache
+        self.BODY_PREFETCH = _bool("BODY_PREFETCH", "true")
+        self.BODY_PREFETCH_BATCH = _int("BODY_PREFETCH_BATCH", "50", minimum=1)
+        self.BODY_CACHE_MAX_ENTRIES = _int("BODY_CACHE_MAX_ENTRIES", "500", minimum=1)
+
+        # Skip pages whose generated content matches the fingerprint from the last run
+        self.SKIP_UNCHANGED = _bool("SKIP_UNCHANGED", "false")
+
+        # ─────────────────────────────
+        # Object Limiting (for troubleshooting)
+        # ─────────────────────────────
+        self.LIMIT_OBJECTS = _bool("LIMIT_OBJECTS", "false")
+        self.OBJECT_LIMIT = _int("OBJECT_LIMIT", "10", minimum=0)
+
+    @property
+    def CONFLUENCE_AUTH(self):
+        """Basic auth string for the Confluence REST API."""
+        if not (self.CONFLUENCE_EMAIL and self.CONFLUENCE_API_TOKEN):
+            return None
+        import base64
+        return base64.b64encode(
+            f"{self.CONFLUENCE_EMAIL}:{self.CONFLUENCE_API_TOKEN}".encode("utf-8")
+        ).decode("utf-8")
+
+
+def get_settings():
+    """The cached Settings (loads .env and validates on first call)."""
+    global _settings
+    if _settings is None:
+        load_env()
+        with _lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
+
+
+def __getattr__(name):
+    # PEP 562: only called for names not yet in the module namespace
+    if not name.isupper():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    settings = get_settings()
+    try:
+        value = getattr(settings, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    if name == "LOG_DIR":
+        os.makedirs(value, exist_ok=True)
+    globals()[name] = value  # later reads skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | {n for n in dir(Settings) if n.isupper()} | set(vars(get_settings())))
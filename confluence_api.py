@@ -1,9 +1,10 @@
-import requests
 import config
+from http_session import get_session
 
 class ConfluenceAPI:
-    def __init__(self, base_url, email, token, space_id):
+    def __init__(self, base_url, email, token, space_id, session=None):
         self.base_url = base_url
+        self.session = session or get_session()
         self.email = email
         self.token = token
         self.space_id = space_id
@@ -19,7 +20,7 @@ class ConfluenceAPI:
         if parent_id:
             payload["parentId"] = int(parent_id)
 
-        resp = requests.post(url, json=payload, auth=self.auth)
+        resp = self.session.post(url, json=payload, auth=self.auth)
         if config.DEBUG:
             print("DEBUG Payload:", payload)
             print("DEBUG URL:", url)
@@ -29,7 +30,7 @@ class ConfluenceAPI:
     def get_page_version(self, page_id):
         """Fetch current version of a page (v2 API)."""
         url = f"{self.base_url}/wiki/api/v2/pages/{page_id}?body-format=storage"
-        resp = requests.get(url, auth=self.auth)
+        resp = self.session.get(url, auth=self.auth)
         resp.raise_for_status()
         data = resp.json()
         return data.get("version", {}).get("number", 1)
@@ -46,7 +47,7 @@ class ConfluenceAPI:
             "body": {"representation": "storage", "value": body},
             "version": {"number": new_version}
         }
-        resp = requests.put(url, json=payload, auth=self.auth)
+        resp = self.session.put(url, json=payload, auth=self.auth)
         if config.DEBUG:
             print("DEBUG Update Payload:", payload)
             print("DEBUG URL:", url)
@@ -60,7 +61,7 @@ class ConfluenceAPI:
         if parent_id:
             params["parentId"] = int(parent_id)
 
-        resp = requests.get(url, params=params, auth=self.auth)
+        resp = self.session.get(url, params=params, auth=self.auth)
         if config.DEBUG:
             print("DEBUG find_page_by_title URL:", resp.url)
         resp.raise_for_status()
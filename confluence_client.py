@@ -1,35 +1,47 @@
 import logging
-import requests
 import json
+from http_session import get_session
 
 logger = logging.getLogger(__name__)
 
+# create_or_update_page(page=...) default: look the page up first
+_LOOKUP = object()
+
+
+class PageConflict(Exception):
+    """409 on update: the page changed since its version was read."""
+
+    def __init__(self, page_id, response):
+        super().__init__(f"Version conflict on page {page_id}")
+        self.page_id = page_id
+        self.response = response
+
+
 class ConfluenceClient:
-    def __init__(self, base_url, email, api_token, space_id):
+    def __init__(self, base_url, email, api_token, space_id, session=None, page_index=None, prefetcher=None):
         self.base_url = base_url.rstrip("/")
+        self.session = session or get_session()
+        self.page_index = page_index
+        self.prefetcher = prefetcher  # BodyPrefetcher of atlas_doc_format bodies
         self.auth = (email, api_token)
         self.space_id = space_id
         self.headers = {"Content-Type": "application/json"}
 
     def get_page(self, title, parent_id):
         """Fetch a page by title (v2) and return full body + version (v1)."""
-        search_url = (
-            f"{self.base_url}/wiki/api/v2/pages"
-            f"?spaceId={self.space_id}&title={title}&expand=version"
-        )
-        resp = requests.get(search_url, auth=self.auth, headers=self.headers)
-        resp.raise_for_status()
-        data = resp.json()
-
-        if not data.get("results"):
+        page_id = self.find_page_id(title, parent_id)
+        if not page_id:
             return None
 
-        page = data["results"][0]
-        page_id = page["id"]
+        # A bulk-prefetched v2 page has the same id/title/version/body.atlas_doc_format keys
+        if self.prefetcher is not None:
+            page = self.prefetcher.get(page_id)
+            if page is not None:
+                return page
 
         # Step 2: fetch body using v1 API (atlas_doc_format + storage)
         url_v1 = f"{self.base_url}/wiki/rest/api/content/{page_id}?expand=body.atlas_doc_format,body.storage,version"
-        resp2 = requests.get(url_v1, auth=self.auth, headers=self.headers)
+        resp2 = self.session.get(url_v1, auth=self.auth, headers=self.headers)
         resp2.raise_for_status()
         full_page = resp2.json()
 
@@ -47,13 +59,41 @@ class ConfluenceClient:
 
         return full_page
 
-    def create_or_update_page(self, parent_id, title, body, representation="atlas_doc_format"):
-        """Create new page if missing, else update existing (v2)."""
-        page = self.get_page(title, parent_id)
+    def find_page_id(self, title, parent_id):
+        if self.page_index is not None and self.page_index.covers():
+            ref = self.page_index.get(title)
+            return ref.id if ref else None
+
+        search_url = (
+            f"{self.base_url}/wiki/api/v2/pages"
+            f"?spaceId={self.space_id}&title={title}&expand=version"
+        )
+        resp = self.session.get(search_url, auth=self.auth, headers=self.headers)
+        resp.raise_for_status()
+        data = resp.json()
+
+        if not data.get("results"):
+            return None
+        return data["results"][0]["id"]
+
+    def _remember(self, page, parent_id=None):
+        if self.page_index is not None:
+            self.page_index.update_from_response(page, parent_id)
+        return page
+
+    def create_or_update_page(self, parent_id, title, body, representation="atlas_doc_format", page=_LOOKUP):
+        """
+        Create new page if missing, else update existing (v2).
+        Pass the page already fetched with get_page() (or None when it is known
+        not to exist) to skip the lookup; its version is used for the update.
+        """
+        if page is _LOOKUP:
+            page = self.get_page(title, parent_id)
 
         if page and page.get("id"):
             logger.info(f"🔄 Updating Confluence page '{title}' (ID={page['id']})")
-            return self.update_page(page["id"], title, body, representation=representation)
+            version = (page.get("version") or {}).get("number")
+            return self.update_page(page["id"], title, body, representation=representation, version=version)
         else:
             logger.info(f"🆕 Creating new Confluence page '{title}' under parent {parent_id}")
             return self.create_page(parent_id, title, body, representation=representation)
@@ -71,19 +111,21 @@ class ConfluenceClient:
                 "value": body
             },
         }
-        resp = requests.post(url, json=payload, auth=self.auth, headers=self.headers)
+        resp = self.session.post(url, json=payload, auth=self.auth, headers=self.headers)
         if resp.status_code >= 400:
             logger.error(f"❌ Failed to create page '{title}': {resp.text}")
         resp.raise_for_status()
-        return resp.json()
+        return self._remember(resp.json(), parent_id)
 
-    def update_page(self, page_id, title, body, representation="atlas_doc_format"):
-        """Update an existing Confluence page by ID (default atlas_doc_format)."""
-        # Fetch current version (v2 API)
-        url_get = f"{self.base_url}/wiki/api/v2/pages/{page_id}?expand=version"
-        resp_get = requests.get(url_get, auth=self.auth, headers=self.headers)
-        resp_get.raise_for_status()
-        current_version = resp_get.json().get("version", {}).get("number", 1)
+    def update_page(self, page_id, title, body, representation="atlas_doc_format", version=None):
+        """
+        Update an existing Confluence page by ID (default atlas_doc_format).
+        `version` is the page's current version when the caller already has
+        it. A 409 raises PageConflict: the body was built from an older read of
+        the page, so the caller has to read, merge and write it again.
+        """
+        if version is None:
+            version = self._current_version(page_id)
 
         url = f"{self.base_url}/wiki/api/v2/pages/{page_id}"
         payload = {
@@ -91,14 +133,30 @@ class ConfluenceClient:
             "title": title,
             "spaceId": self.space_id,
             "status": "current",
-            "version": {"number": current_version + 1},
+            "version": {"number": version + 1},
             "body": {
                 "representation": representation,
                 "value": body
             },
         }
-        resp = requests.put(url, json=payload, auth=self.auth, headers=self.headers)
+        resp = self.session.put(url, json=payload, auth=self.auth, headers=self.headers)
+        if resp.status_code == 409:
+            raise PageConflict(page_id, resp)
         if resp.status_code >= 400:
             logger.error(f"❌ Failed to update page {page_id}: {resp.text}")
         resp.raise_for_status()
-        return resp.json()
+        return self._remember(resp.json())
+
+    def delete_page(self, page_id):
+        """Move a page to the space trash (v2 DELETE; restorable from the trash)."""
+        url = f"{self.base_url}/wiki/api/v2/pages/{page_id}"
+        resp = self.session.delete(url, auth=self.auth, headers=self.headers)
+        if resp.status_code >= 400:
+            logger.error(f"❌ Failed to delete page {page_id}: {resp.text}")
+        resp.raise_for_status()
+
+    def _current_version(self, page_id):
+        url_get = f"{self.base_url}/wiki/api/v2/pages/{page_id}"
+        resp_get = self.session.get(url_get, auth=self.auth, headers=self.headers)
+        resp_get.raise_for_status()
+        return resp_get.json().get("version", {}).get("number", 1)
@@ -0,0 +1,375 @@
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+V2_PAGES = re.compile(r"^/wiki/api/v2/pages/?$")
+V2_PAGE = re.compile(r"^/wiki/api/v2/pages/(\d+)/?$")
+V2_SPACE_PAGES = re.compile(r"^/wiki/api/v2/spaces/([^/]+)/pages/?$")
+V1_CONTENT = re.compile(r"^/wiki/rest/api/content/(\d+)/?$")
+V1_LABELS = re.compile(r"^/wiki/rest/api/content/(\d+)/label/?$")
+V1_LABEL = re.compile(r"^/wiki/rest/api/content/(\d+)/label/([^/]+)/?$")
+
+
+class ConfluenceStandIn:
+    """
+    In-process stand-in for the Confluence endpoints the uploaders use:
+
+      v2  GET/POST /wiki/api/v2/pages, GET/PUT/DELETE /wiki/api/v2/pages/{id},
+          GET /wiki/api/v2/spaces/{id}/pages (cursor-paginated)
+      v1  GET /wiki/rest/api/content/{id},
+          GET/POST/DELETE /wiki/rest/api/content/{id}/label
+
+    Pages live in memory. Every request can be delayed (latency + jitter),
+    answered with 429 + Retry-After (throttle_rate) or a 503 (error_rate), and
+    PUTs can fail with a 409 version conflict (conflict_rate) on top of real
+    version checks.
+
+        with ConfluenceStandIn(latency=0.05) as server:
+            os.environ["CONFLUENCE_DOMAIN"] = server.base_url
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, space_id="1", latency=0.0, jitter=0.0,
+                 throttle_rate=0.0, retry_after=1, conflict_rate=0.0, error_rate=0.0,
+                 page_limit=250, seed=None):
+        self.space_id = str(space_id)
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.conflict_rate = conflict_rate
+        self.error_rate = error_rate
+        self.page_limit = page_limit
+        self.pages = {}
+        self.stats = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 100000
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("🧪 Confluence stand-in listening on %s", self.base_url)
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- page store ----------
+
+    def add_page(self, title, parent_id, body="", representation="storage", labels=()):
+        with self._lock:
+            page_id = str(self._next_id)
+            self._next_id += 1
+            self.pages[page_id] = {
+                "id": page_id,
+                "title": title,
+                "spaceId": self.space_id,
+                "parentId": str(parent_id) if parent_id else None,
+                "status": "current",
+                "version": {"number": 1},
+                "body": {"representation": representation, "value": body},
+                "labels": set(labels),
+            }
+            return self.pages[page_id]
+
+    def find(self, title):
+        with self._lock:
+            return next((p for p in self.pages.values() if p["title"] == title), None)
+
+    # ---------- fault injection ----------
+
+    def _roll(self, rate):
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            with self._lock:
+                extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            time.sleep(self.latency + extra)
+
+    # ---------- views ----------
+
+    def _v2(self, page, body_format=None):
+        out = {k: page[k] for k in ("id", "title", "spaceId", "parentId", "status")}
+        out["version"] = dict(page["version"])
+        if body_format:
+            body = page["body"]
+            value = body["value"] if body["representation"] == body_format else ""
+            out["body"] = {body_format: {"representation": body_format, "value": value}}
+        return out
+
+    def _v1(self, page):
+        body = page["body"]
+        return {
+            "id": page["id"],
+            "type": "page",
+            "title": page["title"],
+            "version": dict(page["version"]),
+            "ancestors": [{"id": page["parentId"]}] if page["parentId"] else [],
+            "body": {body["representation"]: {"value": body["value"],
+                                              "representation": body["representation"]}},
+        }
+
+
+def _make_handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            logger.debug("stand-in: " + fmt, *args)
+
+        # ---------- plumbing ----------
+
+        def _send(self, status, payload=None, headers=None):
+            data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, str(value))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            return json.loads(raw) if raw else None
+
+        def _dispatch(self, method):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            body = self._json_body() if method in ("POST", "PUT") else None
+            server._delay()
+            server.stats[f"{method} {_endpoint(parsed.path)}"] += 1
+
+            if server._roll(server.throttle_rate):
+                server.stats["429"] += 1
+                return self._send(429, {"message": "Rate limited"}, {
+                    "Retry-After": server.retry_after,
+                    "X-RateLimit-Remaining": 0,
+                })
+            if server._roll(server.error_rate):
+                server.stats["503"] += 1
+                return self._send(503, {"message": "Service unavailable"})
+
+            for pattern, handler in ROUTES.get(method, ()):
+                match = pattern.match(parsed.path)
+                if match:
+                    return handler(self, query, body, *match.groups())
+            self._send(404, {"message": f"No stand-in route for {method} {parsed.path}"})
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PUT(self):
+            self._dispatch("PUT")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        # ---------- v2 ----------
+
+        def list_pages(self, query, _body):
+            ids = query.get("id")
+            title = (query.get("title") or [None])[0]
+            parent = (query.get("parentId") or [None])[0]
+            body_format = (query.get("body-format") or [None])[0]
+            with server._lock:
+                pages = list(server.pages.values())
+            if ids:
+                wanted = {i for v in ids for i in v.split(",")}
+                pages = [p for p in pages if p["id"] in wanted]
+            if title:
+                pages = [p for p in pages if p["title"] == title]
+            if parent:
+                pages = [p for p in pages if p["parentId"] == str(parent)]
+            self._send(200, {"results": [server._v2(p, body_format) for p in pages], "_links": {}})
+
+        def create_page(self, _query, body, *_):
+            body = body or {}
+            title = body.get("title")
+            if not title:
+                return self._send(400, {"message": "title is required"})
+            if server.find(title):
+                return self._send(400, {"message": f"A page with this title already exists: {title}"})
+            page = server.add_page(
+                title, body.get("parentId"),
+                (body.get("body") or {}).get("value", ""),
+                (body.get("body") or {}).get("representation", "storage"),
+            )
+            self._send(200, server._v2(page))
+
+        def get_page(self, query, _body, page_id):
+            page = server.pages.get(page_id)
+            if not page:
+                return self._send(404, {"message": "Page not found"})
+            body_format = (query.get("body-format") or [None])[0]
+            self._send(200, server._v2(page, body_format))
+
+        def update_page(self, _query, body, page_id):
+            page = server.pages.get(page_id)
+            if not page:
+                return self._send(404, {"message": "Page not found"})
+            body = body or {}
+            wanted = (body.get("version") or {}).get("number")
+            with server._lock:
+                current = page["version"]["number"]
+                if server._rng.random() < server.conflict_rate:
+                    # Simulate a concurrent edit landing first
+                    page["version"]["number"] = current + 1
+                    current += 1
+                    wanted = None
+                if wanted != current + 1:
+                    server.stats["409"] += 1
+                    conflict = True
+                else:
+                    conflict = False
+                    page["version"]["number"] = wanted
+                    page["title"] = body.get("title", page["title"])
+                    if body.get("parentId"):
+                        page["parentId"] = str(body["parentId"])
+                    if body.get("body"):
+                        page["body"] = {
+                            "representation": body["body"].get("representation", "storage"),
+                            "value": body["body"].get("value", ""),
+                        }
+            if conflict:
+                return self._send(409, {"message": f"Version conflict: current version is {current}"})
+            self._send(200, server._v2(page))
+
+        def space_pages(self, query, _body, space_id):
+            if space_id != server.space_id:
+                return self._send(404, {"message": "Space not found"})
+            limit = int((query.get("limit") or [server.page_limit])[0])
+            start = int((query.get("cursor") or ["0"])[0])
+            with server._lock:
+                pages = sorted(server.pages.values(), key=lambda p: int(p["id"]))
+            chunk = pages[start:start + limit]
+            links = {}
+            if start + limit < len(pages):
+                links["next"] = f"/wiki/api/v2/spaces/{space_id}/pages?limit={limit}&cursor={start + limit}"
+            self._send(200, {"results": [server._v2(p) for p in chunk], "_links": links})
+
+        # ---------- v1 ----------
+
+        def delete_page(self, _query, _body, page_id):
+            with server._lock:
+                page = server.pages.pop(page_id, None)
+            if not page:
+                return self._send(404, {"message": "Page not found"})
+            self._send(204)
+
+        def get_content(self, _query, _body, page_id):
+            page = server.pages.get(page_id)
+            if not page:
+                return self._send(404, {"message": "Page not found"})
+            self._send(200, server._v1(page))
+
+        def get_labels(self, _query, _body, page_id):
+            page = server.pages.get(page_id)
+            if not page:
+                return self._send(404, {"message": "Page not found"})
+            results = [{"prefix": "global", "name": n} for n in sorted(page["labels"])]
+            self._send(200, {"results": results, "size": len(results)})
+
+        def add_labels(self, _query, body, page_id):
+            page = server.pages.get(page_id)
+            if not page:
+                return self._send(404, {"message": "Page not found"})
+            items = body if isinstance(body, list) else [body or {}]
+            with server._lock:
+                page["labels"].update(i.get("name") for i in items if i.get("name"))
+            self.get_labels(_query, None, page_id)
+
+        def delete_label(self, _query, _body, page_id, name):
+            page = server.pages.get(page_id)
+            if not page:
+                return self._send(404, {"message": "Page not found"})
+            with server._lock:
+                page["labels"].discard(name)
+            self._send(204)
+
+    ROUTES = {
+        "GET": [
+            (V2_PAGES, Handler.list_pages),
+            (V2_PAGE, Handler.get_page),
+            (V2_SPACE_PAGES, Handler.space_pages),
+            (V1_LABELS, Handler.get_labels),
+            (V1_CONTENT, Handler.get_content),
+        ],
+        "POST": [(V2_PAGES, Handler.create_page), (V1_LABELS, Handler.add_labels)],
+        "PUT": [(V2_PAGE, Handler.update_page)],
+        "DELETE": [(V2_PAGE, Handler.delete_page), (V1_LABEL, Handler.delete_label)],
+    }
+    return Handler
+
+
+def _endpoint(path):
+    """Collapse ids so stats group by endpoint."""
+    return re.sub(r"/\d+", "/{id}", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Confluence stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--space-id", default="1")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random 0..jitter seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--conflict-rate", type=float, default=0.0, help="fraction of PUTs answered 409")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = ConfluenceStandIn(
+        host=args.host, port=args.port, space_id=args.space_id, latency=args.latency,
+        jitter=args.jitter, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        conflict_rate=args.conflict_rate, error_rate=args.error_rate, seed=args.seed,
+    ).start()
+    print(f"CONFLUENCE_DOMAIN={server.base_url}  CONFLUENCE_SPACE_ID={server.space_id}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(dict(server.stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
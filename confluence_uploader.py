@@ -1,6 +1,7 @@
 import logging
 import json
 from datetime import datetime
+import adf
 
 logger = logging.getLogger(__name__)
 
@@ -33,9 +34,11 @@ class ConfluenceUploader:
         title = object_name
         preserved_blocks = []
         page_found = False
+        lookup = {}
 
         try:
             page = self.client.get_page(title, parent_id)
+            lookup["page"] = page
             if page:
                 page_found = True
                 raw = page.get("body", {}).get("atlas_doc_format", {}).get("value", "")
@@ -148,31 +151,10 @@ class ConfluenceUploader:
                  "marks": [{"type": "em"}]}]}
         )
 
-        new_content = {"type": "doc", "version": 1, "content": preserved_blocks}
         self.client.create_or_update_page(
             parent_id=parent_id, title=title,
-            body=json.dumps(new_content), representation="atlas_doc_format"
+            body=adf.dumps_doc(adf.doc(preserved_blocks)), representation="atlas_doc_format", **lookup
         )
 
     def _build_table(self, headers, rows):
-        table = {"type": "table",
-                 "attrs": {"isNumberColumnEnabled": False, "layout": "default"},
-                 "content": []}
-        header_row = {"type": "tableRow", "content": []}
-        for h in headers:
-            header_row["content"].append({
-                "type": "tableHeader", "attrs": {},
-                "content": [{"type": "paragraph",
-                             "content": [{"type": "text", "text": str(h)}]}]
-            })
-        table["content"].append(header_row)
-        for row in rows:
-            row_obj = {"type": "tableRow", "content": []}
-            for cell in row:
-                row_obj["content"].append({
-                    "type": "tableCell", "attrs": {},
-                    "content": [{"type": "paragraph",
-                                 "content": [{"type": "text", "text": str(cell)}]}]
-                })
-            table["content"].append(row_obj)
-        return table
+        return adf.table(headers, rows)
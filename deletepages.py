@@ -1,6 +1,6 @@
 import os
-import requests
 import config
+from http_session import get_session
 
 BASE_URL = f"https://{config.CONFLUENCE_DOMAIN}/wiki"
 AUTH = (config.CONFLUENCE_EMAIL, config.CONFLUENCE_API_TOKEN)
@@ -19,7 +19,7 @@ def find_pages_under_parent(parent_id):
     start = 0
     while True:
         params["start"] = start
-        resp = requests.get(url, params=params, auth=AUTH)
+        resp = get_session().get(url, params=params, auth=AUTH)
         resp.raise_for_status()
         data = resp.json()
         for page in data.get("results", []):
@@ -33,7 +33,7 @@ def find_pages_under_parent(parent_id):
 
 def delete_page(page_id):
     url = f"{BASE_URL}/rest/api/content/{page_id}"
-    resp = requests.delete(url, auth=AUTH)
+    resp = get_session().delete(url, auth=AUTH)
     resp.raise_for_status()
 
 if __name__ == "__main__":
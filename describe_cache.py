@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+import re
+import threading
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class DescribeCache:
+    """
+    On-disk describe state for one org: the change stamp (latest
+    EntityDefinition/CustomField LastModifiedDate) each sObject was last
+    described and uploaded at, plus the global describe's Last-Modified for
+    If-Modified-Since. Only changed objects are described and uploaded, so
+    the describes themselves are not kept. A new stamp stays *pending* until
+    the caller confirms the object was uploaded, so failed uploads are
+    retried on the next run.
+    """
+
+    INDEX_FILE = "_index.json"
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._index = {"globalLastModified": None, "stamps": {}}
+        path = os.path.join(root, self.INDEX_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    self._index.update(json.load(fh))
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ Ignoring unreadable describe cache index %s: %s", path, e)
+        self._next_global = self._index["globalLastModified"]
+
+    @classmethod
+    def from_config(cls, org_alias):
+        safe_org = re.sub(r"[^A-Za-z0-9_.-]", "_", org_alias or "default")
+        return cls(os.path.join(config.STATE_DIR, "describe_cache", safe_org))
+
+    @property
+    def global_last_modified(self):
+        return self._index["globalLastModified"]
+
+    @property
+    def names(self):
+        return set(self._index["stamps"])
+
+    def stamp(self, name):
+        return self._index["stamps"].get(name)
+
+    def is_current(self, name, stamp):
+        return name in self._index["stamps"] and self._index["stamps"][name] == stamp
+
+    def described(self, name, stamp):
+        """Note a fresh describe taken at stamp; it stays pending until confirm()."""
+        with self._lock:
+            self._pending[name] = stamp
+
+    def confirm(self, name):
+        with self._lock:
+            if name in self._pending:
+                self._index["stamps"][name] = self._pending.pop(name)
+
+    def retain_only(self, names):
+        """Drop cache entries for sObjects that no longer exist in the org."""
+        with self._lock:
+            for gone in set(self._index["stamps"]) - set(names):
+                self._index["stamps"].pop(gone, None)
+
+    def set_global_last_modified(self, value):
+        self._next_global = value
+
+    def save(self):
+        with self._lock:
+            # Only advance the If-Modified-Since mark once nothing is pending,
+            # otherwise a 304 next run would hide the unconfirmed objects.
+            if not self._pending:
+                self._index["globalLastModified"] = self._next_global
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, self.INDEX_FILE)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self._index, fh, sort_keys=True, indent=0)
+            os.replace(tmp, path)
+            pending = len(self._pending)
+        if pending:
+            logger.warning("⚠️ %d described objects were not confirmed and will be retried", pending)
@@ -0,0 +1,168 @@
+import glob
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import config
+import perf
+
+logger = logging.getLogger(__name__)
+
+PROJECT_NAME = "tempProj"
+TEMP_PREFIX = "sfproj_"  # prefix of the per-run projects older versions created
+
+
+class WorkspaceLocked(RuntimeError):
+    pass
+
+
+class DxWorkspace:
+    """
+    Persistent Salesforce DX project reused across runs for metadata retrieves.
+
+    The project is generated once under DX_WORKSPACE_DIR. A lock file guards
+    it against concurrent runs; the lock is re-entrant within a process so a
+    caller can hold it across retrieve + parse while the loaders take it too.
+    """
+
+    LOCK_FILE = ".workspace.lock"
+
+    def __init__(self, root=None, cli=None):
+        self.root = root or config.DX_WORKSPACE_DIR
+        self.cli = cli or os.getenv("SF_CLI") or config.SF_CLI
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    @property
+    def project_dir(self):
+        return os.path.join(self.root, PROJECT_NAME)
+
+    @property
+    def flow_dir(self):
+        return os.path.join(self.project_dir, "force-app", "main", "default", "flows")
+
+    def ensure(self):
+        """Generate the DX project on first use and sweep leaked temp projects."""
+        cleanup_stale_temp_projects()
+        if os.path.exists(os.path.join(self.project_dir, "sfdx-project.json")):
+            return self.project_dir
+        os.makedirs(self.root, exist_ok=True)
+        logger.info(f"📂 Generating persistent DX project in {self.root}")
+        with perf.timer("cli", "sf project generate"):
+            result = subprocess.run(
+                [self.cli, "project", "generate", "--name", PROJECT_NAME],
+                cwd=self.root, capture_output=True, text=True,
+            )
+        if result.returncode != 0:
+            raise RuntimeError(f"sf CLI failed: {result.stderr}")
+        return self.project_dir
+
+    def clear_flows(self):
+        """Empty the flows folder so a full retrieve doesn't keep deleted flows."""
+        shutil.rmtree(self.flow_dir, ignore_errors=True)
+
+    @contextmanager
+    def lock(self, timeout=None):
+        timeout = config.DX_LOCK_TIMEOUT if timeout is None else timeout
+        with self._thread_lock:
+            if self._depth == 0:
+                self._acquire(timeout)
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._release()
+
+    def _lock_path(self):
+        return os.path.join(self.root, self.LOCK_FILE)
+
+    def _acquire(self, timeout):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._lock_path()
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                with os.fdopen(fd, "w") as fh:
+                    fh.write(str(os.getpid()))
+                return
+            except FileExistsError:
+                if self._is_stale(path):
+                    logger.warning(f"⚠️ Removing stale DX workspace lock {path}")
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                if time.monotonic() >= deadline:
+                    raise WorkspaceLocked(f"DX workspace {self.root} is in use by another run")
+                time.sleep(1)
+
+    def _release(self):
+        try:
+            os.remove(self._lock_path())
+        except OSError:
+            pass
+
+    @staticmethod
+    def _is_stale(path):
+        """
+        A lock is stale once its owner process is gone. The lock file is not
+        refreshed while held, so its age only decides when the owner can't be
+        probed (not POSIX, or no readable pid).
+        """
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return False
+        try:
+            with open(path, encoding="utf-8") as fh:
+                pid = int(fh.read().strip() or 0)
+        except (OSError, ValueError):
+            pid = 0
+        # Signal 0 only probes for the process on POSIX (on Windows it is CTRL_C_EVENT)
+        if os.name == "posix" and pid:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass  # alive, owned by another user
+            return False
+        return age > config.DX_LOCK_STALE_SECONDS
+
+
+def cleanup_stale_temp_projects(max_age_hours=None):
+    """Delete sfproj_* temp projects left behind by earlier runs."""
+    max_age_hours = config.DX_TEMP_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{TEMP_PREFIX}*")):
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"🧹 Removed {removed} stale temp DX project(s)")
+    return removed
+
+
+_default_workspace = None
+_default_lock = threading.Lock()
+
+
+def get_workspace():
+    """Process-wide default workspace (shared by sf_flow_loader and sf_loader)."""
+    global _default_workspace
+    with _default_lock:
+        if _default_workspace is None:
+            _default_workspace = DxWorkspace()
+        return _default_workspace
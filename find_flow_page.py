@@ -1,13 +1,13 @@
 import os
 import logging
-from dotenv import load_dotenv
 from confluence_client import ConfluenceClient  # using your existing client
+import config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def main():
-    load_dotenv()
+    config.load_env()
 
     flow_to_find = os.getenv("FINDFLOW")
     if not flow_to_find:
@@ -24,6 +24,7 @@ def main():
     if not domain.startswith("http"):
         domain = f"https://{domain}"
 
+    # A single lookup: one title search is cheaper than listing the space
     client = ConfluenceClient(domain, email, token, space_id)
 
     search_title = f"{flow_to_find}.flow-meta"
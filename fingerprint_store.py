@@ -0,0 +1,80 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts) -> str:
+    """SHA-256 over a canonical JSON encoding of the given parts."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Local state file mapping page keys to the fingerprint of the managed
+    content last written to them. Uploaders skip the GET/PUT/label calls
+    when the freshly generated content hashes to the stored value.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    self._data = json.load(fh)
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ Ignoring unreadable fingerprint state %s: %s", path, e)
+
+    @classmethod
+    def from_config(cls, name):
+        return cls(os.path.join(config.STATE_DIR, f"{name}_fingerprints.json"))
+
+    @staticmethod
+    def key(parent_id, title):
+        return f"{parent_id}/{title}"
+
+    def matches(self, key, digest):
+        with self._lock:
+            return self._data.get(key) == digest
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def note_skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def record(self, key, digest):
+        with self._lock:
+            if self._data.get(key) != digest:
+                self._data[key] = digest
+                self._dirty = True
+
+    def forget(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Atomically write the state file if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self._data, fh, sort_keys=True, indent=0)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        logger.info("💾 Saved %d fingerprints to %s", len(self._data), self.path)
@@ -0,0 +1,127 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import config
+from flow_parser import PARSER_VERSION, parse_flow_file
+
+logger = logging.getLogger(__name__)
+
+# Keys that depend on the file's path rather than its content
+_PATH_KEYS = ("file", "developerName")
+_FLOW_KEYS = ("file", "label", "developerName", "apiVersion", "processType",
+              "status", "description", "elements", "objects", "fields")
+
+
+class FlowParseCache:
+    """
+    Content-addressed cache of parsed flows in a SQLite file.
+
+    Entries are keyed by the SHA-256 of the flow XML and tagged with
+    flow_parser.PARSER_VERSION; entries from another parser version are
+    ignored and purged. The least recently used entries are evicted once the
+    cache grows past max_entries.
+    """
+
+    EVICT_EVERY = 500  # puts between eviction passes
+
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = max_entries or config.FLOW_PARSE_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = set()
+        self._puts = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS flows ("
+                " digest TEXT PRIMARY KEY,"
+                " parser_version TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM flows WHERE parser_version != ?", (PARSER_VERSION,))
+
+    @classmethod
+    def from_config(cls):
+        return cls(os.path.join(config.STATE_DIR, "flow_parse_cache.sqlite"))
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def lookup(self, file_path):
+        """Return (digest, flow or None, raw bytes) for a flow file."""
+        with open(file_path, "rb") as fh:
+            data = fh.read()
+        digest = self.digest(data)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM flows WHERE digest = ? AND parser_version = ?",
+                (digest, PARSER_VERSION),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return digest, None, data
+            self.hits += 1
+            self._touched.add(digest)
+        return digest, self._restore(json.loads(row[0]), file_path), data
+
+    def store(self, digest, flow):
+        payload = {k: v for k, v in flow.items() if k not in _PATH_KEYS}
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO flows (digest, parser_version, data, last_used)"
+                    " VALUES (?, ?, ?, ?)",
+                    (digest, PARSER_VERSION, json.dumps(payload), time.time()),
+                )
+            self._puts += 1
+            if self._puts % self.EVICT_EVERY == 0:
+                self._evict()
+
+    def parse(self, file_path):
+        """parse_flow_file() with the cache in front of it."""
+        digest, flow, data = self.lookup(file_path)
+        if flow is None:
+            flow = parse_flow_file(file_path, source=io.BytesIO(data))
+            self.store(digest, flow)
+        return flow
+
+    def close(self):
+        with self._lock:
+            with self._conn:
+                if self._touched:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE flows SET last_used = ? WHERE digest = ?",
+                        [(now, d) for d in self._touched],
+                    )
+                    self._touched.clear()
+                self._evict()
+            self._conn.close()
+        logger.info(f"🗃️ Flow parse cache: {self.hits} hits, {self.misses} misses")
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM flows").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM flows WHERE digest IN"
+                    " (SELECT digest FROM flows ORDER BY last_used ASC LIMIT ?)",
+                    (excess,),
+                )
+
+    @staticmethod
+    def _restore(payload, file_path):
+        payload["file"] = file_path
+        payload["developerName"] = os.path.basename(file_path).split(".flow-meta.xml")[0]
+        return {k: payload.get(k) for k in _FLOW_KEYS}
@@ -1,7 +1,11 @@
 import os
-import requests
 import logging
 import re
+import config
+import perf
+from http_session import get_session
+from fingerprint_store import FingerprintStore, fingerprint
+from labels import LabelSync
 
 logger = logging.getLogger(__name__)
 
@@ -13,65 +17,145 @@ SECTION_BLOCK_RE = re.compile(
 )
 
 class FlowConfluenceUploader:
-    def __init__(self):
-        self.base_url = f"https://{os.getenv('CONFLUENCE_DOMAIN')}/wiki/api/v2"
+    def __init__(self, session=None, page_index=None, fingerprints=None, journal=None, prefetcher=None):
+        self.session = session or get_session()
+        self.page_index = page_index
+        self.fingerprints = fingerprints
+        self.journal = journal
+        self.prefetcher = prefetcher  # BodyPrefetcher of storage bodies
+        self._digests = {}  # item -> fingerprint computed by plan_prefetch
+        self.site_url = config.site_url(os.getenv("CONFLUENCE_DOMAIN"))
+        self.base_url = f"{self.site_url}/wiki/api/v2"
         self.auth = (os.getenv("CONFLUENCE_EMAIL"), os.getenv("CONFLUENCE_API_TOKEN"))
         self.space_id = os.getenv("CONFLUENCE_SPACE_ID")
         self.parent_id = os.getenv("FLOW_FOLDER") or os.getenv("CONFLUENCE_FLOW_PARENT_PAGE_ID")
         self.label_name = os.getenv("CONFLUENCE_LABEL", "flow")
+        self.labels = LabelSync(self.session, self.site_url, auth=self.auth, page_index=page_index)
+
+    @staticmethod
+    def _title(flow):
+        return flow["label"] or flow.get("developerName") or "Unnamed Flow"
+
+    def plan_prefetch(self, flow):
+        """
+        Queue the body of the flow's existing page (if indexed) for the bulk
+        prefetch, unless its upload won't read it: labels-only on resume, or
+        skipped as unchanged.
+        """
+        if self.prefetcher is None or self.page_index is None or not self.page_index.covers():
+            return
+        title = self._title(flow)
+        ref = self.page_index.get(title)
+        if not ref or self._uploaded(flow):
+            return
+        if self.fingerprints is not None:
+            # Kept for upload_flow_doc, so the section is only rendered once
+            digest = self._digests[self._item(flow)] = self._fingerprint(flow, title)
+            if self.fingerprints.matches(FingerprintStore.key(self.parent_id, title), digest):
+                return
+        self.prefetcher.plan([ref.id])
 
     def upload_flow_doc(self, flow):
-        title = flow["label"] or flow.get("developerName") or "Unnamed Flow"
+        title = self._title(flow)
+        item = self._item(flow)
+
+        # Uploaded by an interrupted run: only the labels are left to do
+        if self._uploaded(flow):
+            page_id = self.journal.get(item, "page_id")
+            logger.info(f"♻️ Already uploaded, labelling only: {title}")
+            self._apply_labels(page_id, flow)
+            self._journal(item, "labelled", page_id)
+            return page_id
+
         page = self._find_page(title)
 
+        digest = None
+        if self.fingerprints is not None:
+            key = FingerprintStore.key(self.parent_id, title)
+            digest = self._digests.pop(item, None) or self._fingerprint(flow, title)
+            if page and self.fingerprints.matches(key, digest):
+                logger.info(f"⏭ Unchanged, skipping: {title}")
+                self.fingerprints.note_skip()
+                self._journal(item, "labelled", page["id"])
+                return page["id"]
+
         if page:
             logger.info(f"🔄 Updating existing page: {title}")
-            page_id = self._update_page(page, flow)
+            page_id = self._update_page(page, flow, item)
         else:
             logger.info(f"🆕 Creating new page: {title}")
-            page_id = self._create_page(title, flow)
+            page_id = self._create_page(title, flow, item)
 
         if page_id:
-            self._apply_labels(page_id, flow)
+            # A page we just created has no labels yet
+            self._apply_labels(page_id, flow, current=None if page else set())
+            self._journal(item, "labelled", page_id)
+            if digest:
+                self.fingerprints.record(key, digest)
+        return page_id
+
+    def _journal(self, item, stage, page_id=None, version=None):
+        if self.journal is not None:
+            self.journal.record(item, stage, page_id=page_id, version=version)
+
+    def _item(self, flow):
+        """Journal key: the flow's API name."""
+        return flow.get("developerName") or self._title(flow)
+
+    def _uploaded(self, flow):
+        return self.journal is not None and self.journal.has(self._item(flow), "uploaded")
+
+    def _fingerprint(self, flow, title):
+        return fingerprint(title, self._build_update_section(flow), sorted(self._labels_for(flow)))
 
     def _find_page(self, title):
+        if self.page_index is not None and self.page_index.covers():
+            ref = self.page_index.get(title)
+            return self.page_index.as_page(ref) if ref else None
+
         url = f"{self.base_url}/pages"
         params = {"spaceId": self.space_id, "title": title, "parentId": self.parent_id}
-        r = requests.get(url, params=params, auth=self.auth)
+        r = self.session.get(url, params=params, auth=self.auth)
         if r.status_code == 200:
             res = r.json().get("results", [])
             return res[0] if res else None
         logger.error("❌ Page search failed: %s", r.text)
         return None
 
-    def _create_page(self, title, flow):
+    def _create_page(self, title, flow, item=None):
         body = self._build_full_body(flow)  # includes markers
+        self._journal(item or title, "rendered")
         payload = {
             "title": title,
             "spaceId": self.space_id,
             "parentId": self.parent_id,
             "body": {"representation": "storage", "value": body},
         }
-        r = requests.post(f"{self.base_url}/pages", json=payload, auth=self.auth)
+        r = self.session.post(f"{self.base_url}/pages", json=payload, auth=self.auth)
         if r.status_code not in (200, 201):
             logger.error("❌ Failed to create page %s: %s", title, r.text)
             return None
         page_id = r.json().get("id")
+        if self.page_index is not None:
+            self.page_index.update_from_response(r.json(), self.parent_id)
+        self._journal(item or title, "uploaded", page_id, (r.json().get("version") or {}).get("number"))
         logger.info("✅ Created page: %s (ID: %s)", title, page_id)
         return page_id
 
-    def _update_page(self, page, flow):
+    def _update_page(self, page, flow, item=None):
         page_id = page["id"]
-        r = requests.get(
-            f"{self.base_url}/pages/{page_id}",
-            params={"body-format": "storage"},
-            auth=self.auth,
-        )
-        if r.status_code != 200:
-            logger.error("❌ Failed to fetch page %s: %s", page_id, r.text)
-            return None
+        page_data = self.prefetcher.get(page_id) if self.prefetcher is not None else None
+        if page_data is None:
+            r = self.session.get(
+                f"{self.base_url}/pages/{page_id}",
+                params={"body-format": "storage"},
+                auth=self.auth,
+            )
+            if r.status_code != 200:
+                logger.error("❌ Failed to fetch page %s: %s", page_id, r.text)
+                return None
+            page_data = r.json()
 
-        page_data = r.json()
         body_value = page_data["body"]["storage"]["value"]
 
         new_section = self._build_update_section(flow)
@@ -88,6 +172,7 @@ class FlowConfluenceUploader:
             else:
                 # If no <h3>Elements</h3> found, just append
                 new_body = body_value + new_section
+        self._journal(item or page_data["title"], "rendered", page_id)
 
         payload = {
             "id": page_id,
@@ -98,15 +183,18 @@ class FlowConfluenceUploader:
             "body": {"representation": "storage", "value": new_body},
             "version": {"number": page_data["version"]["number"] + 1},
         }
-        r = requests.put(f"{self.base_url}/pages/{page_id}", json=payload, auth=self.auth)
+        r = self.session.put(f"{self.base_url}/pages/{page_id}", json=payload, auth=self.auth)
         if r.status_code not in (200, 201):
             logger.error("❌ Failed to update page %s: %s", page_id, r.text)
             return None
+        if self.page_index is not None:
+            self.page_index.update_from_response(r.json(), self.parent_id)
+        self._journal(item or page_data["title"], "uploaded", page_id, payload["version"]["number"])
         logger.info("✅ Updated page: %s (ID: %s)", page_data["title"], page_id)
         return page_id
 
-    def _apply_labels(self, page_id, flow):
-        """Apply base 'flow' label + any custom object/field (__c) labels"""
+    def _labels_for(self, flow):
+        """Base 'flow' label + any custom object/field (__c) labels"""
         labels = [self.label_name]
 
         # Custom fields
@@ -122,17 +210,15 @@ class FlowConfluenceUploader:
                 safe = o.lower().replace(".", "-").replace(" ", "-")
                 labels.append(safe)
 
-        for label in set(labels):  # de-dupe
-            url = f"https://{os.getenv('CONFLUENCE_DOMAIN')}/wiki/rest/api/content/{page_id}/label"
-            payload = [{"prefix": "global", "name": label}]
-            r = requests.post(url, json=payload, auth=self.auth)
-            if r.status_code not in (200, 201):
-                logger.error("⚠️ Failed to add label '%s' to %s: %s", label, page_id, r.text)
-            else:
-                logger.info("🏷️ Added label '%s' to page %s", label, page_id)
+        return set(labels)  # de-dupe
+
+    def _apply_labels(self, page_id, flow, current=None):
+        """Apply base 'flow' label + any custom object/field (__c) labels in one request"""
+        self.labels.sync(page_id, self._labels_for(flow), current=current)
 
     # ---------- Body builders ----------
 
+    @perf.timed("render", "flow._build_full_body")
     def _build_full_body(self, flow: dict) -> str:
         header = f"""
         <h2>{flow['label']}</h2>
@@ -143,6 +229,7 @@ class FlowConfluenceUploader:
         """
         return header + self._build_update_section(flow)
 
+    @perf.timed("render", "flow._build_update_section")
     def _build_update_section(self, flow: dict) -> str:
         elements_html = "".join(
             f"<li><b>{e['type']}</b>: {e.get('label','')} ({e.get('name','')})"
@@ -1,95 +1,103 @@
 import os
-import re
-import xml.etree.ElementTree as ET
+import multiprocessing
+from flow_xml import extract_flow
+import perf
 
-def _strip_ns(tag: str) -> str:
-    return re.sub(r"^\{.*\}", "", tag or "")
+# Bump whenever parse_flow_file/flow_xml output changes; invalidates the parse cache
+PARSER_VERSION = "2"
 
-def _text(node) -> str:
-    return (node.text or "").strip() if node is not None else ""
-
-def parse_flow_file(file_path: str) -> dict:
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+@perf.timed("parse", "parse_flow_file")
+def parse_flow_file(file_path: str, source=None) -> dict:
+    """Parse a flow file; source may be a binary file object already holding its bytes."""
+    extracted = extract_flow(source if source is not None else file_path)
+    top = extracted["top"]
 
     # Derive DeveloperName from filename (before ".flow-meta.xml")
     base = os.path.basename(file_path)
     developer_name = base.split(".flow-meta.xml")[0]
 
-    flow = {
+    return {
         "file": file_path,
-        "label": "",
+        "label": top.get("label", ""),
         "developerName": developer_name,
-        "apiVersion": "",          # correct field name (was mis-shown as API Name)
-        "processType": "",
-        "status": "",
-        "description": "",
-        "elements": [],            # [{type, label, name, object, field?}]
-        "objects": set(),
-        "fields": set(),
+        "apiVersion": top.get("apiVersion", ""),   # correct field name (was mis-shown as API Name)
+        "processType": top.get("processType", ""),
+        "status": top.get("status", ""),
+        "description": top.get("description", ""),
+        "elements": extracted["elements"],         # [{type, label, name, object}]
+        # Normalize for JSON
+        "objects": sorted(extracted["objects"]),
+        "fields": sorted(extracted["fields"]),
     }
 
-    # Parse top-level metadata
-    for child in root:
-        tag = _strip_ns(child.tag)
-        if tag == "label":
-            flow["label"] = _text(child)
-        elif tag == "apiVersion":
-            flow["apiVersion"] = _text(child)
-        elif tag == "processType":
-            flow["processType"] = _text(child)
-        elif tag == "status":
-            flow["status"] = _text(child)
-        elif tag == "description":
-            flow["description"] = _text(child)
+def _parse_safe(file_path: str):
+    """Pool worker: never raises, so one bad file can't abort the batch."""
+    try:
+        return file_path, parse_flow_file(file_path), None
+    except Exception as e:
+        return file_path, None, str(e)
 
-    # Tags that represent flow elements (common set)
-    element_tags = {
-        "actionCalls", "assignments", "decisions",
-        "recordCreates", "recordLookups", "recordUpdates", "recordDeletes",
-        "screens", "loops", "subflows"
-    }
+def parse_flow_files(file_paths, workers: int = 0, chunksize: int = 0, ordered: bool = True,
+                     cache=None):
+    """
+    Parse many flow files, optionally on a process pool.
 
-    # Walk children and collect element info + object/field refs
-    for elem in root:
-        etag = _strip_ns(elem.tag)
-        if etag in element_tags:
-            name, label, obj = "", "", ""
-            # Scan direct children for common properties
-            for c in elem:
-                ctag = _strip_ns(c.tag)
-                val = _text(c)
-                if ctag == "name":
-                    name = val
-                elif ctag == "label":
-                    label = val
-                elif ctag in ("object", "sObject"):
-                    obj = val
-                    if val:
-                        flow["objects"].add(val)
+    Yields (file_path, flow, error) per file; error is None on success.
+    With workers > 1 files are dispatched to the pool in chunks; ordered=False
+    yields results as soon as each chunk finishes. With a FlowParseCache, hits
+    are served in this process and only misses are parsed (and stored).
+    """
+    file_paths = list(file_paths)
+    digests = {}
+    if cache is not None:
+        hits = {}
+        for f in file_paths:
+            try:
+                digest, flow, _ = cache.lookup(f)
+            except OSError as e:
+                hits[f] = (f, None, str(e))
+                continue
+            if flow is None:
+                digests[f] = digest
+            else:
+                hits[f] = (f, flow, None)
+        if not ordered:
+            yield from hits.values()
+        to_parse = list(digests)
+    else:
+        to_parse = file_paths
 
-            # Deep scan descendants to collect any field-ish nodes
-            # (handles <field>, <fieldApiName>, <targetField>, etc.)
-            for d in elem.iter():
-                dtag = _strip_ns(d.tag).lower()
-                dval = _text(d)
-                if not dval:
-                    continue
-                # Collect fields if tag name includes "field" but ignore non-field metadata
-                if ("field" in dtag) and dtag not in {"fieldtype", "fieldset", "fieldvalues"}:
-                    flow["fields"].add(dval)
-                # Also collect any extra object references we might encounter
-                if dtag in {"object", "sobject"}:
-                    flow["objects"].add(dval)
+    if workers <= 1 or len(to_parse) < 2:
+        parsed = map(_parse_safe, to_parse)
+        pool = None
+    else:
+        workers = min(workers, len(to_parse))
+        # A few chunks per worker balances per-task overhead against stragglers
+        chunksize = chunksize or max(1, len(to_parse) // (workers * 4))
+        pool = multiprocessing.Pool(processes=workers)
+        parsed = (pool.imap if ordered else pool.imap_unordered)(_parse_safe, to_parse, chunksize)
 
-            flow["elements"].append({
-                "type": etag,
-                "label": label,
-                "name": name,
-                "object": obj
-            })
+    try:
+        if cache is None or not ordered:
+            for result in parsed:
+                _store(cache, digests, result)
+                yield result
+        else:
+            # Interleave cache hits and fresh parses back into input order
+            fresh = iter(parsed)
+            for f in file_paths:
+                if f in hits:
+                    yield hits[f]
+                else:
+                    result = next(fresh)
+                    _store(cache, digests, result)
+                    yield result
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
-    # Normalize for JSON
-    flow["objects"] = sorted(flow["objects"])
-    flow["fields"]  = sorted(flow["fields"])
-    return flow
+def _store(cache, digests, result):
+    file_path, flow, error = result
+    if cache is not None and flow is not None and file_path in digests:
+        cache.store(digests[file_path], flow)
@@ -0,0 +1,119 @@
+import xml.etree.ElementTree as ET
+
+SF_NS = "http://soap.sforce.com/2006/04/metadata"
+
+# Top-level metadata read from direct children of <Flow>
+TOP_LEVEL_TAGS = frozenset({"label", "apiVersion", "processType", "status", "description"})
+
+# Tags that represent flow elements (common set)
+ELEMENT_TAGS = frozenset({
+    "actionCalls", "assignments", "decisions",
+    "recordCreates", "recordLookups", "recordUpdates", "recordDeletes",
+    "screens", "loops", "subflows",
+})
+
+# Tags containing "field" that are metadata about fields rather than references
+FIELD_TAG_EXCLUDES = frozenset({"fieldtype", "fieldset", "fieldvalues"})
+
+# Reference tags collected anywhere in the document (sf_loader's field list)
+REF_TAGS = frozenset({"field", "fieldName", "object", "targetField"})
+
+# Raw tag -> (local, is_field, is_object, is_ref). Filled lazily; a flow file
+# only uses a few dozen distinct tags, so each is resolved once per process.
+_TAG_INFO = {}
+
+
+def _tag_info(tag):
+    info = _TAG_INFO.get(tag)
+    if info is None:
+        if tag[:1] == "{":
+            ns, _, local = tag[1:].partition("}")
+        else:
+            ns, local = "", tag
+        lower = local.lower()
+        info = (
+            local,
+            "field" in lower and lower not in FIELD_TAG_EXCLUDES,
+            lower in ("object", "sobject"),
+            ns == SF_NS and local in REF_TAGS,
+        )
+        _TAG_INFO[tag] = info
+    return info
+
+
+def extract_flow(source):
+    """
+    Read a .flow-meta.xml (path or binary file object) in one streaming pass.
+
+    Returns a dict with:
+      top      - top-level metadata {label, apiVersion, processType, status, description}
+      elements - [{type, label, name, object}] for each flow element, in document order
+      objects  - object names referenced by flow elements
+      fields   - field-ish values found inside flow elements
+      refs     - text of every sf:field/fieldName/object/targetField below the root
+
+    Elements are cleared as soon as they are consumed, so memory stays flat
+    regardless of file size. Raises xml.etree.ElementTree.ParseError.
+    """
+    top = {}
+    elements = []
+    objects = set()
+    fields = set()
+    refs = set()
+
+    root = None
+    current = None  # element record for the flow element being read
+    depth = 0
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = elem
+            elif depth == 2:
+                local = _tag_info(elem.tag)[0]
+                if local in ELEMENT_TAGS:
+                    current = {"type": local, "label": "", "name": "", "object": ""}
+            continue
+
+        local, is_field, is_object, is_ref = _tag_info(elem.tag)
+        raw = elem.text
+        text = raw.strip() if raw else ""
+
+        if depth >= 2:
+            if is_ref and raw:
+                refs.add(text)
+
+            if current is not None and text:
+                if is_field:
+                    fields.add(text)
+                if is_object:
+                    objects.add(text)
+
+            if depth == 3 and current is not None:
+                if local == "name":
+                    current["name"] = text
+                elif local == "label":
+                    current["label"] = text
+                elif local in ("object", "sObject"):
+                    current["object"] = text
+
+            elif depth == 2:
+                if local in TOP_LEVEL_TAGS:
+                    top[local] = text
+                if current is not None:
+                    elements.append(current)
+                    current = None
+                # Drop the finished top-level child from the root
+                root.clear()
+
+        elem.clear()
+        depth -= 1
+
+    return {
+        "top": top,
+        "elements": elements,
+        "objects": objects,
+        "fields": fields,
+        "refs": refs,
+    }
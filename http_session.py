@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import config
+import perf
+from throttle import (
+    IDEMPOTENT_METHODS, RETRY_STATUSES, TokenBucket, backoff_delay, near_limit, server_delay,
+)
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with keep-alive pooling, a default request timeout, per-host
+    token-bucket throttling and retries.
+
+    A 429 is retried for any method (the request was not processed) after the
+    server's Retry-After / X-RateLimit-Reset hint, and pauses the whole host
+    so concurrent workers back off too. 502/503/504 and connection errors are
+    retried with jittered exponential backoff for idempotent methods only.
+    """
+
+    def __init__(self, timeout=None, rate_limit=None, burst=None, retries=None,
+                 backoff_base=None, backoff_max=None, **kwargs):
+        self.timeout = timeout
+        self.rate_limit = config.HTTP_RATE_LIMIT if rate_limit is None else rate_limit
+        self.burst = burst or config.HTTP_RATE_BURST
+        self.retries = config.HTTP_MAX_RETRIES if retries is None else retries
+        self.backoff_base = config.HTTP_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = config.HTTP_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.counters = Counter()
+        self._buckets = {}
+        self._counter_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        bucket = self._bucket(request.url)
+        idempotent = request.method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            attempt += 1
+            waited = bucket.acquire()
+            if waited:
+                self._count("throttle_waits", waited_s=waited)
+            started = time.perf_counter()
+            try:
+                response = super().send(request, timeout=timeout, **kwargs)
+                if kwargs.get("stream"):
+                    received = int(response.headers.get("Content-Length") or 0)
+                else:
+                    received = len(response.content or b"")  # read here so the timing covers it
+                self._record(request, response.status_code, started, received)
+            except requests.exceptions.ConnectTimeout:
+                self._record(request, "ConnectTimeout", started)
+                # Never reached the server: safe to retry any method
+                if attempt > self.retries:
+                    self._count("gave_up")
+                    raise
+                self._retry_after(request, attempt, None, "connect timeout")
+                continue
+            except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+                self._record(request, type(e).__name__, started)
+                if not idempotent or attempt > self.retries:
+                    self._count("gave_up")
+                    raise
+                self._retry_after(request, attempt, None, type(e).__name__)
+                continue
+
+            status = response.status_code
+            if status == 429:
+                self._count("throttled")
+                delay = server_delay(response)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                bucket.pause(delay)
+            elif status in RETRY_STATUSES and idempotent:
+                delay = server_delay(response)
+            else:
+                if near_limit(response):
+                    self._count("near_limit")
+                    bucket.pause(server_delay(response) or 1.0)
+                return response
+
+            if attempt > self.retries:
+                self._count("gave_up")
+                return response
+            # Drain so the connection goes back to the pool
+            response.content
+            response.close()
+            self._retry_after(request, attempt, delay, f"HTTP {status}")
+
+    @staticmethod
+    def _record(request, status, started, received=0):
+        body = request.body or b""
+        sent = len(body.encode("utf-8") if isinstance(body, str) else body)
+        perf.RECORDER.add_http(request.method, request.url, status,
+                               time.perf_counter() - started, sent, received)
+
+    def _retry_after(self, request, attempt, delay, reason):
+        if delay is None:
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        self._count("retries")
+        logger.warning(
+            "🔁 %s %s: %s, retry %d/%d in %.1fs",
+            request.method, request.path_url, reason, attempt, self.retries, delay,
+        )
+        time.sleep(delay)
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._counter_lock:
+                bucket = self._buckets.setdefault(host, TokenBucket(self.rate_limit, self.burst))
+        return bucket
+
+    def _count(self, name, waited_s=None):
+        with self._counter_lock:
+            self.counters[name] += 1
+            if waited_s:
+                self.counters["throttle_wait_s"] += waited_s
+
+    def connection_stats(self):
+        """Sum request/connection counters over the live urllib3 pools."""
+        stats = {"pools": 0, "requests": 0, "connections": 0}
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats["pools"] += 1
+            stats["requests"] += pool.num_requests
+            stats["connections"] += pool.num_connections
+        stats["reused"] = max(stats["requests"] - stats["connections"], 0)
+        with self._counter_lock:
+            stats.update(self.counters)
+        return stats
+
+
+def build_session(pool_size=None, pool_connections=None, timeout=None):
+    """Create a new pooled session from config settings (overridable per call)."""
+    adapter = PooledAdapter(
+        timeout=timeout if timeout is not None else config.HTTP_TIMEOUT,
+        pool_connections=pool_connections or config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_size or config.HTTP_POOL_SIZE,
+        # Block instead of opening throw-away connections when every pooled
+        # connection is busy, so concurrent callers keep reusing the pool.
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session():
+    """Return the process-wide shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+                logger.debug(
+                    "Created shared HTTP session (pool size=%s, timeout=%ss)",
+                    config.HTTP_POOL_SIZE, config.HTTP_TIMEOUT,
+                )
+    return _session
+
+
+def connection_stats(session=None):
+    """Return request/connection/reuse counts for a session (default: shared)."""
+    session = session or _session
+    totals = Counter({"pools": 0, "requests": 0, "connections": 0, "reused": 0})
+    if session is None:
+        return totals
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen or not isinstance(adapter, PooledAdapter):
+            continue
+        seen.add(id(adapter))
+        for key, value in adapter.connection_stats().items():
+            totals[key] += value
+    return dict(totals)
+
+
+def log_connection_stats(session=None):
+    stats = connection_stats(session)
+    logger.info(
+        "🔌 HTTP pool: %d requests over %d connections (%d reused)",
+        stats["requests"], stats["connections"], stats["reused"],
+    )
+    if stats.get("throttled") or stats.get("retries") or stats.get("throttle_waits"):
+        logger.info(
+            "🚦 HTTP throttling: %d 429s, %d retries, %d gave up, %d client waits (%.1fs)",
+            stats.get("throttled", 0), stats.get("retries", 0), stats.get("gave_up", 0),
+            stats.get("throttle_waits", 0), stats.get("throttle_wait_s", 0.0),
+        )
+    return stats
@@ -0,0 +1,83 @@
+import logging
+from urllib.parse import quote
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class LabelSync:
+    """
+    Bring a page's labels to a wanted set with as few calls as possible:
+    the current labels come from the caller (a page just created has none),
+    the page index, or one paginated GET; missing labels are then added in a
+    single array POST. With remove_stale, labels not in the wanted set are
+    deleted (one DELETE each - the v1 API has no bulk delete).
+    """
+
+    PAGE_LIMIT = 200
+
+    def __init__(self, session, site_url, auth=None, headers=None, page_index=None, remove_stale=None):
+        self.session = session
+        self.site_url = (site_url or "").rstrip("/")
+        self.auth = auth
+        self.headers = headers
+        self.page_index = page_index
+        self.remove_stale = config.LABEL_REMOVE_STALE if remove_stale is None else remove_stale
+
+    def _url(self, page_id):
+        return f"{self.site_url}/wiki/rest/api/content/{page_id}/label"
+
+    def current(self, page_id):
+        """Labels on the page (page index first, else GET /label). None on failure."""
+        if self.page_index is not None:
+            known = self.page_index.labels_for(page_id)
+            if known is not None:
+                return known
+        labels = set()
+        url, params = self._url(page_id), {"limit": self.PAGE_LIMIT}
+        while url:
+            r = self.session.get(url, params=params, auth=self.auth, headers=self.headers)
+            if r.status_code != 200:
+                logger.warning("⚠️ Could not read labels of page %s: %s", page_id, r.text)
+                return None
+            data = r.json()
+            labels.update(item["name"] for item in data.get("results", []))
+            next_link = data.get("_links", {}).get("next")
+            # v1 links are relative to the /wiki context path
+            url = f"{self.site_url}/wiki{next_link}" if next_link else None
+            params = None
+        return labels
+
+    def sync(self, page_id, labels, current=None):
+        """Apply `labels` to the page; returns (added, removed) label sets."""
+        wanted = {l.lower() for l in labels if l}
+        if current is None:
+            current = self.current(page_id)
+        current = {l.lower() for l in current} if current is not None else set()
+
+        missing = sorted(wanted - current)
+        stale = sorted(current - wanted) if self.remove_stale else []
+        added, removed = set(), set()
+
+        if missing:
+            payload = [{"prefix": "global", "name": name} for name in missing]
+            r = self.session.post(self._url(page_id), json=payload, auth=self.auth, headers=self.headers)
+            if r.status_code in (200, 201, 204):
+                added = set(missing)
+                logger.info("🏷️ Added %d label(s) to page %s: %s", len(missing), page_id, ", ".join(missing))
+            else:
+                logger.error("⚠️ Failed to add labels to %s: %s", page_id, r.text)
+
+        for name in stale:
+            r = self.session.delete(f"{self._url(page_id)}/{quote(name, safe='')}",
+                                    auth=self.auth, headers=self.headers)
+            if r.status_code in (200, 204, 404):
+                removed.add(name)
+            else:
+                logger.warning("⚠️ Failed to remove label '%s' from %s: %s", name, page_id, r.text)
+        if removed:
+            logger.info("🏷️ Removed %d stale label(s) from page %s", len(removed), page_id)
+
+        if self.page_index is not None:
+            self.page_index.set_labels(page_id, (current | added) - removed)
+        return added, removed
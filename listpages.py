@@ -1,6 +1,6 @@
-import requests
 from requests.auth import HTTPBasicAuth
 import config
+from http_session import get_session
 
 BASE_URL = f"https://{config.CONFLUENCE_DOMAIN}"
 EMAIL = config.CONFLUENCE_EMAIL
@@ -29,7 +29,7 @@ def list_pages(space_key):
         }
 
         print(f"DEBUG listing pages: start={start}, limit={limit}")
-        resp = requests.get(url, params=params, auth=HTTPBasicAuth(EMAIL, TOKEN))
+        resp = get_session().get(url, params=params, auth=HTTPBasicAuth(EMAIL, TOKEN))
         resp.raise_for_status()
         data = resp.json()
 
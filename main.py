@@ -1,51 +1,180 @@
+import argparse
 import os
+import sys
 import logging
-import subprocess
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 from confluence_client import ConfluenceClient
 from object_uploader import ConfluenceObjectUploader
-from sf_object_loader import fetch_all as fetch_objects
+from object_loader import fetch_objects
+from describe_cache import DescribeCache
+from dx_workspace import get_workspace
+from http_session import connection_stats, log_connection_stats
+from page_index import PageIndex
+from fingerprint_store import FingerprintStore
+from run_journal import RunJournal
+from body_prefetch import BodyPrefetcher
+import config
+import perf
+import profiling
+import mainflow
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def process_objects(uploader: ConfluenceObjectUploader, parent_id: str):
-    for obj_name, meta, fields in fetch_objects():
+    """Describe and upload objects; returns the number that failed."""
+    journal = uploader.journal
+    describe_cache = DescribeCache.from_config(config.SF_ORG_ALIAS) if config.INCREMENTAL_OBJECTS else None
+    # Objects an interrupted run already uploaded are neither described nor uploaded again
+    done = set(journal.items_at(journal.final_stage)) if journal is not None and journal.resumed else None
+    if done:
+        logger.info("♻️ Skipping %d objects completed by the interrupted run", len(done))
+    objects = fetch_objects(describe_cache, skip=done)
+    profiling.checkpoint("after_retrieve")
+    client = uploader.client
+    # Bodies are planned one prefetch batch ahead, so pages skipped as
+    # unchanged are left out and only a batch of rendered pages is held
+    window = config.BODY_PREFETCH_BATCH
+    failed = 0
+    for i, meta in enumerate(objects):
+        if i % window == 0:
+            uploader.plan_prefetch(parent_id, objects[i:i + window])
+        obj_name = meta.get("name")
+        if journal is not None:
+            journal.record(obj_name, "fetched")
         try:
             logger.info("Uploading object: %s", obj_name)
             uploader.upload_object_doc(
-                parent_id=parent_id, object_name=obj_name, fields=fields, meta=meta
+                parent_id=parent_id, object_name=obj_name, fields=meta.get("fields", []), meta=meta
             )
         except Exception as e:
             logger.error("Failed to upload object %s", obj_name, exc_info=e)
+            failed += 1
+            continue
+        if describe_cache is not None:
+            describe_cache.confirm(obj_name)
+    profiling.checkpoint("after_upload")
+    if describe_cache is not None:
+        describe_cache.save()
+    if client.prefetcher is not None:
+        client.prefetcher.log_stats()
+    return failed
 
 
-if __name__ == "__main__":
-    load_dotenv()
+def sync_objects(client: ConfluenceClient, parent_id: str, resume=False):
+    """Describe and upload objects; returns the number that failed."""
+    fingerprints = FingerprintStore.from_config("objects") if config.SKIP_UNCHANGED else None
+    journal = None
+    if config.RUN_JOURNAL:
+        journal = RunJournal.from_config("objects", final_stage="uploaded", resume=resume or config.RESUME)
+    uploader = ConfluenceObjectUploader(client, fingerprints=fingerprints, journal=journal)
+    with perf.phase("objects"):
+        failed = process_objects(uploader, parent_id)
+    if journal is not None:
+        journal.finish(complete=not failed)
+    uploader.save()
+    if fingerprints is not None:
+        logger.info("⏭ Skipped %d unchanged object pages", fingerprints.skipped)
+    return failed
+
+
+def sync_flows(page_index=None, resume=False):
+    """Retrieve, parse and upload flows; returns the number that failed."""
+    # Same lock mainflow.main() takes, so a standalone mainflow run can't
+    # replace the retrieved files while this one parses them
+    with get_workspace().lock():
+        return mainflow.sync_flows(page_index=page_index, resume=resume)
+
+
+def sync_both(client: ConfluenceClient, parent_id: str, page_index=None, resume=False):
+    """
+    Run the flow and object pipelines side by side in this process. They
+    share the HTTP pool, credentials and page index, and each one's sf CLI
+    retrieve overlaps the other's Confluence uploads. Returns the names of
+    the pipelines that raised or had items fail.
+    """
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="sync") as pool:
+        futures = {
+            "FLOWS": pool.submit(sync_flows, page_index, resume),
+            "OBJECTS": pool.submit(sync_objects, client, parent_id, resume),
+        }
+    return [name for name, future in futures.items() if _pipeline_failed(name, future.result)]
+
+
+def _pipeline_failed(name, result):
+    """Call result() for a pipeline's failed-item count; log and return whether it failed."""
+    try:
+        count = result()
+    except Exception as e:
+        logger.error("❌ %s sync failed", name, exc_info=e)
+        return True
+    if count:
+        logger.error("❌ %s sync: %d item(s) failed", name, count)
+    return bool(count)
+
+
+def run(argv=None):
+    """Run the configured sync; returns the process exit code (1 if anything failed)."""
+    parser = argparse.ArgumentParser(description="Sync Salesforce object/flow documentation to Confluence")
+    parser.add_argument("--profile", action="store_true",
+                        help="write cProfile and tracemalloc reports for this run to the logs folder")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip flows/objects the interrupted previous run already completed")
+    args = parser.parse_args(argv)
+
+    config.load_env()
+    perf.RECORDER.reset()
 
     domain = os.getenv("CONFLUENCE_DOMAIN")
     email = os.getenv("CONFLUENCE_EMAIL")
     token = os.getenv("CONFLUENCE_API_TOKEN")
     space_id = os.getenv("CONFLUENCE_SPACE_ID")
     parent_id = os.getenv("ADMIN_DOCS_PARENT_ID")
-    sync_mode = os.getenv("SYNC_MODE", "OBJECTS").upper()
-
-    if not domain.startswith("http"):
-        domain = f"https://{domain}"
+    sync_mode = config.SYNC_MODE
 
-    client = ConfluenceClient(domain, email, token, space_id)
+    if sync_mode == "FLOWS":
+        logger.info("👉 Running the flow sync for SYNC_MODE=FLOWS")
+        failed = mainflow.main(profile=args.profile, resume=args.resume)
+        if failed:
+            logger.error("❌ Sync finished with %d failed flow(s)", failed)
+            return 1
+        return 0
 
-    if sync_mode == "OBJECTS":
-        uploader = ConfluenceObjectUploader(client)
-        process_objects(uploader, parent_id)
+    domain = config.site_url(domain)
 
-    elif sync_mode == "FLOWS":
-        logger.info("👉 Running mainflow.py for SYNC_MODE=FLOWS")
+    # One space listing serves both pipelines in BOTH mode
+    page_index = None
+    if config.PAGE_INDEX:
         try:
-            subprocess.run(["python", "mainflow.py"], check=True)
-        except subprocess.CalledProcessError as e:
-            logger.error(f"❌ mainflow.py failed: {e}")
+            with perf.phase("page_index"):
+                page_index = PageIndex(domain, (email, token), space_id).load()
+        except Exception as e:
+            logger.warning("⚠️ Could not build page index, falling back to per-page search: %s", e)
+
+    prefetcher = None
+    if config.BODY_PREFETCH and page_index is not None:
+        prefetcher = BodyPrefetcher(domain, (email, token), "atlas_doc_format")
+    client = ConfluenceClient(domain, email, token, space_id, page_index=page_index, prefetcher=prefetcher)
 
-    else:
-        logger.error("Unknown SYNC_MODE: %s", sync_mode)
+    failed = []
+    try:
+        with profiling.session("main", enabled=args.profile):
+            if sync_mode == "OBJECTS":
+                if _pipeline_failed("OBJECTS", lambda: sync_objects(client, parent_id, resume=args.resume)):
+                    failed.append("OBJECTS")
+            else:
+                logger.info("👉 Syncing flows and objects concurrently for SYNC_MODE=BOTH")
+                failed = sync_both(client, parent_id, page_index, resume=args.resume)
+        log_connection_stats()
+    finally:
+        perf.write_report("main", {"sync_mode": sync_mode, "failed": failed, "connection": connection_stats()})
+
+    if failed:
+        logger.error("❌ Sync finished with failures: %s", ", ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -1,48 +1,195 @@
+import argparse
 import os
+import sys
 import logging
-from dotenv import load_dotenv
-from sf_flow_loader import retrieve_flows
-from flow_parser import parse_flow_file
+from concurrent.futures import ThreadPoolExecutor
+from sf_flow_loader import retrieve_flows, FlowWatermark
+from dx_workspace import get_workspace
+from flow_parser import parse_flow_file, parse_flow_files
+from flow_cache import FlowParseCache
 from flow_confluence_client import FlowConfluenceUploader
+from http_session import connection_stats, log_connection_stats
+from page_index import PageIndex
+from fingerprint_store import FingerprintStore
+from run_journal import RunJournal
+from body_prefetch import BodyPrefetcher
+import config
+import perf
+import profiling
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 VERSION = "v0.20.3"
 
-def main():
+def flow_name(flow_file):
+    """DeveloperName of a .flow-meta.xml file (the journal/watermark key)."""
+    return os.path.basename(flow_file).split(".flow-meta.xml")[0]
+
+def parse_flow(uploader, flow_file, parse_cache=None):
+    """Parse one flow and queue its page body for prefetch; None if it fails."""
+    try:
+        flow = parse_cache.parse(flow_file) if parse_cache else parse_flow_file(flow_file)
+    except Exception as e:
+        logger.error(f"❌ Failed to parse flow {flow_file}: {e}")
+        return None
+    if uploader.journal is not None:
+        uploader.journal.record(flow_name(flow_file), "parsed")
+    uploader.plan_prefetch(flow)
+    return flow
+
+def process_flow(uploader, flow_file, flow=None, parse_cache=None):
+    """Parse (unless already parsed), render and upload one flow. Failures stay with this flow."""
+    if flow is None:
+        flow = parse_flow(uploader, flow_file, parse_cache)
+        if flow is None:
+            return False
+    try:
+        page_id = uploader.upload_flow_doc(flow)
+    except Exception as e:
+        logger.error(f"❌ Failed to upload flow {flow.get('label', flow.get('file'))}: {e}")
+        return False
+    return bool(page_id)
+
+def main(profile=False, resume=False):
+    """Run the flow sync on its own; returns the number of flows that failed."""
     logger.info(f"🚀 Starting Flow Documentation Upload ({VERSION})")
+    perf.RECORDER.reset()
 
     # Load environment
-    load_dotenv()
+    config.load_env()
+
+    # Hold the DX workspace for the whole run so another run can't replace
+    # the retrieved files while they are still being parsed
+    try:
+        with profiling.session("mainflow", enabled=profile), get_workspace().lock():
+            failed = sync_flows(resume=resume)
+        log_connection_stats()
+    finally:
+        perf.write_report("mainflow", {"version": VERSION, "connection": connection_stats()})
+
+    logger.info("🎉 Flow documentation upload complete")
+    return failed
 
-    # Step 1: Retrieve flows
-    flow_files = retrieve_flows()
-    logger.info(f"✅ Retrieved {len(flow_files)} flow files")
+def sync_flows(page_index=None, resume=False):
+    """
+    Retrieve, parse and upload flows; returns the number that failed. A
+    loaded page_index of the space may be shared in. With resume, flows the
+    journal of an interrupted run shows as complete are skipped.
+    """
+    watermark = FlowWatermark.from_config() if config.INCREMENTAL_FLOWS else None
+    journal = None
+    if config.RUN_JOURNAL:
+        journal = RunJournal.from_config("flows", final_stage="labelled", resume=resume or config.RESUME)
+
+    # Step 1: Retrieve flows (only changed ones in incremental mode). A resumed
+    # run reuses the files it already retrieved while they are still on disk;
+    # the watermark needs a fresh query, so it always retrieves.
+    fetched = journal.items_at("fetched") if journal is not None and journal.resumed else {}
+    reuse = [f["file"] for f in fetched.values() if f.get("file")]
+    if watermark is None and reuse and all(os.path.exists(f) for f in reuse):
+        flow_files = sorted(reuse)
+        logger.info(f"♻️ Reusing {len(flow_files)} flow files retrieved by the interrupted run")
+    else:
+        with perf.phase("retrieve"):
+            flow_files = retrieve_flows(watermark=watermark)
+        logger.info(f"✅ Retrieved {len(flow_files)} flow files")
+        if journal is not None:
+            for flow_file in flow_files:
+                journal.record(flow_name(flow_file), "fetched", file=flow_file)
+    profiling.checkpoint("after_retrieve")
 
     # Step 2: FLOWTEST mode: only keep the first 10 flows
     if os.getenv("FLOWTEST", "false").lower() == "true":
         flow_files = flow_files[:10]
         logger.warning("⚠️ FLOWTEST enabled — processing only first 10 flows")
 
-    # Step 3: Parse each flow
-    flows = []
-    for f in flow_files:
+    # Step 3: Build the shared Confluence state
+    if page_index is None and config.PAGE_INDEX:
         try:
-            flow_data = parse_flow_file(f)
-            flows.append(flow_data)
+            with perf.phase("page_index"):
+                page_index = PageIndex.from_config()
         except Exception as e:
-            logger.error(f"❌ Failed to parse flow {f}: {e}")
+            logger.warning(f"⚠️ Could not build page index, falling back to per-flow search: {e}")
+    fingerprints = FingerprintStore.from_config("flows") if config.SKIP_UNCHANGED else None
+    # Page bodies are prefetched in bulk as flows are parsed (their titles are
+    # only known then), in the order the upload workers will need them
+    prefetcher = None
+    if config.BODY_PREFETCH and page_index is not None and page_index.covers():
+        prefetcher = BodyPrefetcher.from_config("storage")
+    uploader = FlowConfluenceUploader(page_index=page_index, fingerprints=fingerprints,
+                                      journal=journal, prefetcher=prefetcher)
 
-    # Step 4: Upload to Confluence
-    uploader = FlowConfluenceUploader()
-    for flow in flows:
-        try:
-            uploader.upload_flow_doc(flow)
-        except Exception as e:
-            logger.error(f"❌ Failed to upload flow {flow.get('label', flow.get('file'))}: {e}")
+    # Flows completed by the interrupted run count as done (and confirm the watermark)
+    results = {}
+    if journal is not None and journal.resumed:
+        results = {f: True for f in flow_files if journal.done(flow_name(f))}
+        flow_files = [f for f in flow_files if f not in results]
+        logger.info(f"♻️ Skipping {len(results)} completed flows, {len(flow_files)} left")
 
-    logger.info("🎉 Flow documentation upload complete")
+    # Step 4: Parse, render and upload each flow on a bounded worker pool.
+    # With FLOW_PARSE_WORKERS > 1 parsing runs on a process pool instead and
+    # each parsed flow is handed to the upload workers as soon as it's ready.
+    # With body prefetch on, parsing gets its own worker pool that runs ahead
+    # of the upload workers, so the bulk fetches see a queue of upcoming pages.
+    workers = max(1, config.FLOW_UPLOAD_CONCURRENCY)
+    logger.info(f"⚙️ Processing flows with {workers} concurrent worker(s)")
+    parse_cache = FlowParseCache.from_config() if config.FLOW_PARSE_CACHE else None
+    futures = {}
+    with perf.phase("parse_and_upload"), \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow") as pool:
+        if config.FLOW_PARSE_WORKERS > 1:
+            logger.info(f"⚙️ Parsing flows on {config.FLOW_PARSE_WORKERS} processes")
+            parsed = parse_flow_files(flow_files, workers=config.FLOW_PARSE_WORKERS,
+                                      ordered=config.FLOW_PARSE_ORDERED, cache=parse_cache)
+            for flow_file, flow, error in parsed:
+                if error:
+                    logger.error(f"❌ Failed to parse flow {flow_file}: {error}")
+                    futures[flow_file] = None
+                else:
+                    if journal is not None:
+                        journal.record(flow_name(flow_file), "parsed")
+                    uploader.plan_prefetch(flow)
+                    futures[flow_file] = pool.submit(process_flow, uploader, flow_file, flow)
+            profiling.checkpoint("after_parse")
+        elif prefetcher is not None:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow-parse") as parse_pool:
+                parsed = {f: parse_pool.submit(parse_flow, uploader, f, parse_cache) for f in flow_files}
+                for flow_file, parsing in parsed.items():
+                    flow = parsing.result()
+                    futures[flow_file] = flow and pool.submit(process_flow, uploader, flow_file, flow)
+        else:
+            for flow_file in flow_files:
+                futures[flow_file] = pool.submit(process_flow, uploader, flow_file,
+                                                 parse_cache=parse_cache)
+        results.update((f, bool(fut and fut.result())) for f, fut in futures.items())
+    profiling.checkpoint("after_upload")
+    if parse_cache is not None:
+        parse_cache.close()
+    if prefetcher is not None:
+        prefetcher.log_stats()
+    failed = list(results.values()).count(False)
+    if failed:
+        logger.warning(f"⚠️ {failed} of {len(results)} flows failed")
+    if journal is not None:
+        journal.finish(complete=not failed)
+
+    if watermark is not None:
+        for flow_file, ok in results.items():
+            if ok:
+                watermark.confirm(flow_name(flow_file))
+        watermark.save()
+
+    if fingerprints is not None:
+        fingerprints.save()
+        logger.info(f"⏭ Skipped {fingerprints.skipped} unchanged flow pages")
+    return failed
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Upload Salesforce flow documentation to Confluence")
+    parser.add_argument("--profile", action="store_true",
+                        help="write cProfile and tracemalloc reports for this run to the logs folder")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip flows the interrupted previous run already completed")
+    args = parser.parse_args()
+    sys.exit(1 if main(profile=args.profile, resume=args.resume) else 0)
@@ -1,13 +1,23 @@
 import subprocess
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set
+import config
+import perf
+from cli_executor import CliExecutor
+from sf_rest import SalesforceRestClient
+from describe_cache import DescribeCache
 
 logger = logging.getLogger(__name__)
 
-def run_cli(cmd: List[str]) -> Optional[Dict[str, Any]]:
+def run_cli(cmd: List[str], timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
     logger.debug("Running CLI: %s", " ".join(cmd))
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        with perf.timer("cli", perf.cli_key(cmd)):
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.error("CLI timed out after %ss: %s", timeout, " ".join(cmd))
+        return None
     if result.returncode != 0:
         logger.error("CLI failed: %s", result.stderr)
         return None
@@ -42,8 +52,16 @@ def _normalize_sobject_names(result_part: Any) -> List[str]:
                 )
     return sorted({n for n in names if n})
 
-def fetch_object_by_name(sf_cli: str, org_alias: str, object_name: str) -> Optional[Dict[str, Any]]:
-    desc = run_cli([sf_cli, "sobject", "describe", "-s", object_name, "--json", "-o", org_alias])
+def _describe_cmd(sf_cli: str, org_alias: str, object_name: str) -> List[str]:
+    return [sf_cli, "sobject", "describe", "-s", object_name, "--json", "-o", org_alias]
+
+def fetch_object_by_name(sf_cli: str, org_alias: str, object_name: str,
+                         rest_client=None) -> Optional[Dict[str, Any]]:
+    if rest_client is not None:
+        return _shape_describe(object_name, rest_client.describe_many([object_name]).get(object_name))
+    return _shape_describe(object_name, run_cli(_describe_cmd(sf_cli, org_alias, object_name)))
+
+def _shape_describe(object_name: str, desc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     desc_res = _unwrap_result(desc)
     if not desc_res or not isinstance(desc_res, dict):
         logger.error("Describe failed or returned no data for: %s", object_name)
@@ -66,17 +84,93 @@ def fetch_object_by_name(sf_cli: str, org_alias: str, object_name: str) -> Optio
         "recordTypeInfos": desc_res.get("recordTypeInfos", []),
     }
 
-def fetch_all_objects(sf_cli: str, org_alias: str) -> List[Dict[str, Any]]:
-    listed = run_cli([sf_cli, "sobject", "list", "--json", "-o", org_alias])
-    names = _normalize_sobject_names(_unwrap_result(listed))
+def iter_objects(sf_cli: str, org_alias: str, names: List[str],
+                 workers: Optional[int] = None, rest_client=None) -> Iterator[Dict[str, Any]]:
+    """
+    Describe names, yielding in completion order: Composite-batched over REST
+    when a rest_client is given, otherwise on the parallel CLI executor.
+    """
+    if rest_client is not None:
+        results = rest_client.iter_describes(names)
+    else:
+        executor = CliExecutor(run_cli, workers=workers)
+        results = executor.run((name, _describe_cmd(sf_cli, org_alias, name)) for name in names)
+    for name, desc in results:
+        meta = _shape_describe(name, desc)
+        if meta:
+            yield meta
+
+def rest_client_for_mode(rest_client=None):
+    """Return a REST client when OBJECT_DESCRIBE_MODE=REST (or the one given)."""
+    if rest_client is None and config.OBJECT_DESCRIBE_MODE == "REST":
+        rest_client = SalesforceRestClient.from_cli()
+    return rest_client
+
+def fetch_all_objects(sf_cli: str, org_alias: str, workers: Optional[int] = None,
+                      rest_client=None, skip: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    rest_client = rest_client_for_mode(rest_client)
+    if rest_client is not None:
+        names = _normalize_sobject_names(rest_client.list_sobjects())
+    else:
+        listed = run_cli([sf_cli, "sobject", "list", "--json", "-o", org_alias])
+        names = _normalize_sobject_names(_unwrap_result(listed))
 
     if not names:
         logger.error("No SObjects returned from CLI list. Check org alias/permissions.")
         return []
+    if skip:
+        names = [n for n in names if n not in skip]
 
-    all_data: List[Dict[str, Any]] = []
-    for name in names:
-        meta = fetch_object_by_name(sf_cli, org_alias, name)
-        if meta:
-            all_data.append(meta)
+    all_data = list(iter_objects(sf_cli, org_alias, names, workers=workers, rest_client=rest_client))
+    all_data.sort(key=lambda m: m.get("name") or "")
     return all_data
+
+def fetch_changed_objects(describe_cache: DescribeCache, rest_client=None,
+                          skip: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Incremental describe: only sObjects whose metadata changed since they were
+    last cached (or that are new) are described and returned.
+    """
+    rest_client = rest_client or SalesforceRestClient.from_cli()
+
+    listing, last_modified = rest_client.list_sobjects_if_modified(describe_cache.global_last_modified)
+    if listing is None and describe_cache.names:
+        logger.info("Global describe not modified since %s; no objects changed",
+                    describe_cache.global_last_modified)
+        return []
+    if listing is None:
+        listing, last_modified = rest_client.list_sobjects_if_modified(None)
+
+    names = _normalize_sobject_names(listing)
+    describe_cache.retain_only(names)
+    describe_cache.set_global_last_modified(last_modified)
+
+    stamps = rest_client.object_change_stamps()
+    changed = [n for n in names if not describe_cache.is_current(n, stamps.get(n, ""))]
+    logger.info("%d of %d objects changed since last sync", len(changed), len(names))
+    if skip:
+        changed = [n for n in changed if n not in skip]
+
+    results: List[Dict[str, Any]] = []
+    for meta in iter_objects("", "", changed, rest_client=rest_client):
+        describe_cache.described(meta["name"], stamps.get(meta["name"], ""))
+        results.append(meta)
+    results.sort(key=lambda m: m.get("name") or "")
+    return results
+
+def fetch_objects(describe_cache: Optional[DescribeCache] = None,
+                  skip: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Describe objects for the configured org. With a describe_cache only changed
+    objects are returned; callers confirm() each one after it is uploaded.
+    Names in `skip` (already uploaded by an interrupted run) are not described.
+    """
+    if describe_cache is not None:
+        objects = fetch_changed_objects(describe_cache, skip=skip)
+    else:
+        objects = fetch_all_objects(config.SF_CLI, config.SF_ORG_ALIAS, skip=skip)
+
+    if config.LIMIT_OBJECTS:
+        logger.warning("LIMIT_OBJECTS enabled — processing only first %d objects", config.OBJECT_LIMIT)
+        objects = objects[:config.OBJECT_LIMIT]
+    return objects
@@ -1,12 +1,35 @@
 import logging
 import json
 from datetime import datetime
+import adf
+import config
+import perf
+from fingerprint_store import FingerprintStore, fingerprint
+from confluence_client import PageConflict
 
 logger = logging.getLogger(__name__)
 
+FIELD_HEADERS = ("Label (API Name)", "Type", "Length/Precision/Scale",
+                 "Required", "Unique", "Default", "Picklist Values",
+                 "References", "Help Text")
+CHILD_HEADERS = ("Child SObject", "Field", "Relationship Name", "Cascade Delete", "Restricted Delete")
+RULE_HEADERS = ("Name", "Description", "Error Condition Formula", "Error Message")
+# Sections that move to "<Object> - <section>" child pages on a split
+SPLIT_SECTIONS = ("Fields", "Picklist Values", "Child Relationships")
+# Fields table on a split page: picklists get their own child page
+SPLIT_FIELD_HEADERS = tuple(h for h in FIELD_HEADERS if h != "Picklist Values")
+PICKLIST_HEADERS = ("Field", "Picklist Values")
+
 class ConfluenceObjectUploader:
-    def __init__(self, client):
+    # Times a page edited while we merged it is re-read and merged again
+    CONFLICT_RETRIES = 3
+
+    def __init__(self, client, fingerprints=None, page_budget=None, journal=None):
         self.client = client
+        self.fingerprints = fingerprints  # also holds the child page sections
+        self.journal = journal
+        self.page_budget = config.OBJECT_PAGE_BUDGET if page_budget is None else page_budget
+        self._prepared = {}  # object name -> _prepare() result computed by plan_prefetch
 
     def _flatten_text(self, node):
         out = []
@@ -26,13 +49,88 @@ class ConfluenceObjectUploader:
         txt = self._flatten_text(heading_block).strip()
         return " ".join(txt.split())
 
+    def plan_prefetch(self, parent_id, objects):
+        """
+        Queue the bodies of the objects' existing pages for the bulk prefetch,
+        in upload order, leaving out those the fingerprint check will skip.
+        """
+        client = self.client
+        if client.prefetcher is None or client.page_index is None or not client.page_index.covers():
+            return
+        page_ids = []
+        for meta in objects:
+            name = meta.get("name")
+            ref = client.page_index.get(name)
+            if not ref:
+                continue
+            if self.fingerprints is not None:
+                # Kept for upload_object_doc, so the page is only rendered once
+                prepared = self._prepared[name] = self._prepare(name, meta.get("fields", []), meta)
+                if self.fingerprints.matches(FingerprintStore.key(parent_id, name), prepared[2]):
+                    continue
+            page_ids.append(ref.id)
+        client.prefetcher.plan(page_ids)
+
     def upload_object_doc(self, parent_id, object_name, fields, meta):
+        title = object_name
+        managed_blocks, split, digest = self._prepared.pop(object_name, None) or self._prepare(object_name, fields, meta)
+
+        # Skip the GETs/PUTs entirely, child pages included, when the
+        # generated sections match what was written last time
+        if digest:
+            key = FingerprintStore.key(parent_id, title)
+            page_id = self.fingerprints.matches(key, digest) and self.client.find_page_id(title, parent_id)
+            if page_id:
+                logger.info("⏭ Unchanged, skipping: %s", title)
+                self.fingerprints.note_skip()
+                self._journal(object_name, "uploaded", page_id)
+                return None
+
+        if split:
+            managed_blocks = self._split_into_child_pages(parent_id, object_name, fields, meta)
+        for attempt in range(self.CONFLICT_RETRIES + 1):
+            try:
+                result = self._merge_and_write(parent_id, object_name, meta, managed_blocks)
+                break
+            except PageConflict:
+                if attempt == self.CONFLICT_RETRIES:
+                    raise
+                logger.warning("⚠️ %s was edited concurrently, re-reading and merging again", title)
+        self._journal(object_name, "uploaded", result.get("id"), (result.get("version") or {}).get("number"))
+        if digest:
+            self.fingerprints.record(key, digest)
+        if not split and result.get("id"):
+            # The object shrank back under the budget
+            self._remove_child_pages(result["id"], object_name)
+        return result
+
+    def _prepare(self, object_name, fields, meta):
+        """
+        The managed blocks, whether they need splitting into child pages and,
+        with fingerprints, their digest (the generated sections, not the
+        timestamp).
+        """
+        managed_blocks = self._build_managed_blocks(fields, meta)
+        split = bool(self.page_budget) and len(adf.dumps_doc(managed_blocks).encode("utf-8")) > self.page_budget
+        digest = fingerprint(object_name, managed_blocks, split) if self.fingerprints is not None else None
+        return managed_blocks, split, digest
+
+    def save(self):
+        """Persist the fingerprint state (object pages and child sections)."""
+        if self.fingerprints is not None:
+            self.fingerprints.save()
+
+    def _merge_and_write(self, parent_id, object_name, meta, managed_blocks):
+        """Read the page, keep its human-edited top blocks, replace the rest and write it."""
         title = object_name
         preserved_blocks = []
         page_found = False
+        # Hand the fetched page (id, version) to the upsert so it doesn't look it up again
+        lookup = {}
 
         try:
             page = self.client.get_page(title, parent_id)
+            lookup["page"] = page
             if page:
                 page_found = True
                 raw = page.get("body", {}).get("atlas_doc_format", {}).get("value", "")
@@ -48,126 +146,206 @@ class ConfluenceObjectUploader:
             logger.warning("Could not parse existing page for %s: %s", title, e)
 
         if not page_found or not preserved_blocks:
-            preserved_blocks = [
-                {"type": "heading", "attrs": {"level": 1},
-                 "content": [{"type": "text", "text": f"Object: {object_name}"}]},
-                {"type": "paragraph", "content": [
-                    {"type": "text", "text": "Label: ", "marks": [{"type": "strong"}]},
-                    {"type": "text", "text": meta.get("label", "")}]},
-                {"type": "paragraph", "content": [
-                    {"type": "text", "text": "Custom: ", "marks": [{"type": "strong"}]},
-                    {"type": "text", "text": str(meta.get("custom", ""))}]},
-                {"type": "paragraph", "content": [
-                    {"type": "text", "text": "KeyPrefix: ", "marks": [{"type": "strong"}]},
-                    {"type": "text", "text": meta.get("keyPrefix", "")}]},
-                {"type": "heading", "attrs": {"level": 2},
-                 "content": [{"type": "text", "text": "Description"}]},
-                {"type": "paragraph", "content": [
-                    {"type": "text", "text": meta.get("description", "")}]},
-                {"type": "heading", "attrs": {"level": 2},
-                 "content": [{"type": "text", "text": "Description Notes"}]},
-                {"type": "paragraph", "content": [{"type": "text", "text": ""}]},
-                {"type": "heading", "attrs": {"level": 2},
-                 "content": [{"type": "text", "text": "Custom Notes"}]},
-                {"type": "paragraph", "content": [{"type": "text", "text": ""}]},
-            ]
+            preserved_blocks = self._build_header_blocks(object_name, meta)
+
+        preserved_blocks.extend(managed_blocks)
+        preserved_blocks.append(self._timestamp_block())
+
+        with perf.timer("render", "object.serialize"):
+            body = adf.dumps_doc(adf.doc(preserved_blocks))
+        self._journal(object_name, "rendered")
+        return self.client.create_or_update_page(
+            parent_id=parent_id, title=title,
+            body=body, representation="atlas_doc_format", **lookup
+        )
+
+    def _journal(self, item, stage, page_id=None, version=None):
+        if self.journal is not None:
+            self.journal.record(item, stage, page_id=page_id, version=version)
+
+    def _build_header_blocks(self, object_name, meta):
+        """Default top-of-page blocks for a page that has no human-edited content yet."""
+        return [
+            adf.heading(f"Object: {object_name}", level=1),
+            adf.labelled("Label", meta.get("label", "")),
+            adf.labelled("Custom", meta.get("custom", "")),
+            adf.labelled("KeyPrefix", meta.get("keyPrefix", "")),
+            adf.heading("Description"),
+            adf.paragraph(meta.get("description", "")),
+            adf.heading("Description Notes"),
+            adf.paragraph(),
+            adf.heading("Custom Notes"),
+            adf.paragraph(),
+        ]
+
+    @perf.timed("render", "object._build_managed_blocks")
+    def _build_managed_blocks(self, fields, meta):
+        """Fields / Child Relationships / Validation Rules sections, rebuilt on every run."""
+        blocks = []
 
         # Add Fields section
         if fields:
-            preserved_blocks.append(
-                {"type": "heading", "attrs": {"level": 2},
-                 "content": [{"type": "text", "text": "Fields"}]}
-            )
-            headers = ["Label (API Name)", "Type", "Length/Precision/Scale",
-                       "Required", "Unique", "Default", "Picklist Values",
-                       "References", "Help Text"]
-            rows = []
-            for f in sorted(fields, key=lambda x: x.get("label", "")):
-                if f.get("type") in ["double", "currency"]:
-                    length_scale = f"{f.get('precision','')},{f.get('scale','')}"
-                else:
-                    length_scale = str(f.get("length") or "")
-                picklist_vals = ""
-                if isinstance(f.get("picklistValues"), list):
-                    picklist_vals = ", ".join([p.get("value", "") for p in f["picklistValues"]])
-                refs = ""
-                if isinstance(f.get("referenceTo"), list):
-                    refs = ", ".join(f["referenceTo"])
-                notes = f.get("inlineHelpText", "") or f.get("description", "")
-                rows.append([
-                    f"{f.get('label','')} ({f.get('name','')})",
-                    f.get("type", ""), length_scale,
-                    "✅" if not f.get("nillable", True) else "❌",
-                    "✅" if f.get("unique", False) else "❌",
-                    f.get("defaultValue", ""), picklist_vals, refs, notes
-                ])
-            preserved_blocks.append(self._build_table(headers, rows))
+            blocks.append(adf.heading("Fields"))
+            blocks.append(adf.table(FIELD_HEADERS, self._field_rows(fields)))
 
         # Child Relationships
         if isinstance(meta.get("childRelationships"), list):
-            preserved_blocks.append(
-                {"type": "heading", "attrs": {"level": 2},
-                 "content": [{"type": "text", "text": "Child Relationships"}]}
-            )
-            headers = ["Child SObject", "Field", "Relationship Name", "Cascade Delete", "Restricted Delete"]
-            rows = []
-            for cr in meta["childRelationships"]:
-                rows.append([
-                    cr.get("childSObject", ""), cr.get("field", ""),
-                    cr.get("relationshipName", ""),
-                    "✅" if cr.get("cascadeDelete") else "❌",
-                    "✅" if cr.get("restrictedDelete") else "❌"
-                ])
-            preserved_blocks.append(self._build_table(headers, rows))
-
-        # Validation Rules
-        preserved_blocks.append(
-            {"type": "heading", "attrs": {"level": 2},
-             "content": [{"type": "text", "text": "Validation Rules"}]}
-        )
-        headers = ["Name", "Description", "Error Condition Formula", "Error Message"]
+            blocks.append(adf.heading("Child Relationships"))
+            blocks.append(adf.table(CHILD_HEADERS, self._child_rows(meta)))
+
+        blocks.extend(self._build_rule_blocks(meta))
+        return blocks
+
+    def _build_rule_blocks(self, meta):
         rows = []
         rules = meta.get("validationRules") or []
         if isinstance(rules, list):
-            for r in rules:
-                rows.append([
-                    r.get("fullName", ""), r.get("description", ""),
-                    r.get("errorConditionFormula", ""), r.get("errorMessage", "")
-                ])
-        preserved_blocks.append(self._build_table(headers, rows))
-
-        preserved_blocks.append(
-            {"type": "paragraph", "content": [
-                {"type": "text",
-                 "text": f"Last Updated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                 "marks": [{"type": "em"}]}]}
-        )
+            rows = [
+                (r.get("fullName", ""), r.get("description", ""),
+                 r.get("errorConditionFormula", ""), r.get("errorMessage", ""))
+                for r in rules
+            ]
+        return [adf.heading("Validation Rules"), adf.table(RULE_HEADERS, rows)]
 
-        new_content = {"type": "doc", "version": 1, "content": preserved_blocks}
-        self.client.create_or_update_page(
-            parent_id=parent_id, title=title,
-            body=json.dumps(new_content), representation="atlas_doc_format"
+    @staticmethod
+    def _field_rows(fields, picklists=True):
+        rows = []
+        for f in sorted(fields, key=lambda x: x.get("label", "")):
+            if f.get("type") in ["double", "currency"]:
+                length_scale = f"{f.get('precision','')},{f.get('scale','')}"
+            else:
+                length_scale = str(f.get("length") or "")
+            refs = ""
+            if isinstance(f.get("referenceTo"), list):
+                refs = ", ".join(f["referenceTo"])
+            notes = f.get("inlineHelpText", "") or f.get("description", "")
+            row = [
+                f"{f.get('label','')} ({f.get('name','')})",
+                f.get("type", ""), length_scale,
+                "✅" if not f.get("nillable", True) else "❌",
+                "✅" if f.get("unique", False) else "❌",
+                f.get("defaultValue", ""), refs, notes
+            ]
+            if picklists:
+                picklist_vals = ""
+                if isinstance(f.get("picklistValues"), list):
+                    picklist_vals = ", ".join([p.get("value", "") for p in f["picklistValues"]])
+                row.insert(6, picklist_vals)
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def _child_rows(meta):
+        return [
+            (cr.get("childSObject", ""), cr.get("field", ""),
+             cr.get("relationshipName", ""),
+             "✅" if cr.get("cascadeDelete") else "❌",
+             "✅" if cr.get("restrictedDelete") else "❌")
+            for cr in meta["childRelationships"]
+        ]
+
+    @staticmethod
+    def _timestamp_block():
+        return adf.paragraph(
+            adf.text(f"Last Updated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", adf.EM)
         )
 
+    # ---------- Oversized pages ----------
+
+    def _split_sections(self, fields, meta):
+        """(section title, blocks) for each section moved to a child page."""
+        sections = []
+        if fields:
+            sections.append(("Fields", [adf.table(SPLIT_FIELD_HEADERS, self._field_rows(fields, picklists=False))]))
+            picklist_rows = [
+                (f"{f.get('label','')} ({f.get('name','')})", ", ".join(p.get("value", "") for p in f["picklistValues"]))
+                for f in sorted(fields, key=lambda x: x.get("label", ""))
+                if isinstance(f.get("picklistValues"), list) and f["picklistValues"]
+            ]
+            if picklist_rows:
+                sections.append(("Picklist Values", [adf.table(PICKLIST_HEADERS, picklist_rows)]))
+        if isinstance(meta.get("childRelationships"), list) and meta["childRelationships"]:
+            sections.append(("Child Relationships", [adf.table(CHILD_HEADERS, self._child_rows(meta))]))
+        return sections
+
+    def _split_into_child_pages(self, parent_id, object_name, fields, meta):
+        """
+        Upsert the large sections as child pages of the object page and return
+        the object page's managed blocks: links to them + validation rules.
+        """
+        main_id = self.client.find_page_id(object_name, parent_id)
+        if not main_id:
+            # Children need a parent: create the object page with its header first
+            created = self.client.create_page(
+                parent_id, object_name, adf.dumps_doc(adf.doc(self._build_header_blocks(object_name, meta)))
+            )
+            main_id = created["id"]
+
+        links = []
+        sections = self._split_sections(fields, meta)
+        for section, blocks in sections:
+            child_title = f"{object_name} - {section}"
+            child_id = self._upsert_child_page(main_id, child_title, blocks)
+            links.append(adf.paragraph(adf.link(child_title, self._page_url(child_id))))
+        logger.info("✂️ Split %s into %d child page(s)", object_name, len(links))
+        self._remove_child_pages(main_id, object_name, keep={s for s, _ in sections})
+
+        return [
+            adf.heading("Fields"),
+            adf.paragraph("This object is large; its reference sections are on child pages:"),
+            adf.bullet_list(links),
+        ] + self._build_rule_blocks(meta)
+
+    def _upsert_child_page(self, main_id, title, blocks):
+        """Write a fully generated child page (skipped when its section is unchanged)."""
+        child_id = self.client.find_page_id(title, main_id)
+        key = FingerprintStore.key(main_id, title)
+        digest = fingerprint(title, blocks) if self.fingerprints is not None else None
+        if child_id and digest and self.fingerprints.matches(key, digest):
+            logger.info("⏭ Unchanged, skipping: %s", title)
+            self.fingerprints.note_skip()
+            return child_id
+
+        # Nothing on a child page is preserved, so its body is never fetched;
+        # without a version the update reads the current one, so a conflict
+        # only needs the write repeated
+        body = adf.dumps_doc(adf.doc(blocks + [self._timestamp_block()]))
+        for attempt in range(self.CONFLICT_RETRIES + 1):
+            try:
+                result = self.client.create_or_update_page(
+                    parent_id=main_id, title=title, body=body,
+                    representation="atlas_doc_format",
+                    page={"id": child_id} if child_id else None,
+                )
+                break
+            except PageConflict:
+                if attempt == self.CONFLICT_RETRIES:
+                    raise
+                logger.warning("⚠️ %s was edited concurrently, writing it again", title)
+        if digest:
+            self.fingerprints.record(key, digest)
+        return result["id"]
+
+    def _remove_child_pages(self, main_id, object_name, keep=()):
+        """
+        Move split-off child pages whose section is no longer split off to the
+        trash. With fingerprints only the children written before are looked
+        up; otherwise every possible child is (free with the page index).
+        """
+        for section in SPLIT_SECTIONS:
+            title = f"{object_name} - {section}"
+            key = FingerprintStore.key(main_id, title)
+            if section in keep or (self.fingerprints is not None and key not in self.fingerprints):
+                continue
+            child_id = self.client.find_page_id(title, main_id)
+            if child_id:
+                logger.info("🗑️ Removing stale child page %s (ID=%s)", title, child_id)
+                self.client.delete_page(child_id)
+            if self.fingerprints is not None:
+                self.fingerprints.forget(key)
+
+    def _page_url(self, page_id):
+        return f"{self.client.base_url}/wiki/pages/viewpage.action?pageId={page_id}"
+
     def _build_table(self, headers, rows):
-        table = {"type": "table",
-                 "attrs": {"isNumberColumnEnabled": False, "layout": "default"},
-                 "content": []}
-        header_row = {"type": "tableRow", "content": []}
-        for h in headers:
-            header_row["content"].append({
-                "type": "tableHeader", "attrs": {},
-                "content": [{"type": "paragraph",
-                             "content": [{"type": "text", "text": str(h)}]}]
-            })
-        table["content"].append(header_row)
-        for row in rows:
-            row_obj = {"type": "tableRow", "content": []}
-            for cell in row:
-                row_obj["content"].append({
-                    "type": "tableCell", "attrs": {},
-                    "content": [{"type": "paragraph",
-                                 "content": [{"type": "text", "text": str(cell)}]}]
-                })
-            table["content"].append(row_obj)
-        return table
+        return adf.table(headers, rows)
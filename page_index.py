@@ -0,0 +1,124 @@
+import logging
+import threading
+from collections import namedtuple
+import config
+from http_session import get_session
+
+logger = logging.getLogger(__name__)
+
+PageRef = namedtuple("PageRef", ["id", "title", "version", "parent_id"])
+
+
+class PageIndex:
+    """
+    In-memory title -> (id, version, parentId) map of every page in the
+    space, built from a single cursor-paginated space listing. Titles are
+    unique per space, so once loaded a miss means the page doesn't exist
+    anywhere in it, wherever it was moved to. Uploaders consult it instead of
+    sending one title search per item and keep it current from their
+    create/update responses.
+    """
+
+    PAGE_LIMIT = 250
+
+    def __init__(self, site_url, auth, space_id, session=None):
+        self.site_url = site_url.rstrip("/")
+        self.auth = auth
+        self.space_id = str(space_id)
+        self.session = session or get_session()
+        self.loaded = False
+        self._pages = {}
+        self._labels = {}  # page id -> labels known to be on the page
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, session=None):
+        index = cls(
+            config.CONFLUENCE_BASE_URL,
+            (config.CONFLUENCE_EMAIL, config.CONFLUENCE_API_TOKEN),
+            config.CONFLUENCE_SPACE_ID,
+            session=session,
+        )
+        return index.load()
+
+    def load(self):
+        """List every current page in the space."""
+        url = f"{self.site_url}/wiki/api/v2/spaces/{self.space_id}/pages"
+        params = {"limit": self.PAGE_LIMIT, "status": "current"}
+        found = {}
+        while url:
+            r = self.session.get(url, params=params, auth=self.auth)
+            r.raise_for_status()
+            data = r.json()
+            for page in data.get("results", []):
+                found[page["title"]] = self._ref_from(page)
+            next_link = data.get("_links", {}).get("next")
+            # The cursor is embedded in the next link, which is site-relative
+            url = f"{self.site_url}{next_link}" if next_link else None
+            params = None
+
+        with self._lock:
+            self._pages.update(found)
+            self.loaded = True
+        logger.info("📇 Indexed %d pages in space %s", len(found), self.space_id)
+        return self
+
+    def covers(self):
+        """True when a miss is authoritative (the space listing was loaded)."""
+        return self.loaded
+
+    def get(self, title):
+        with self._lock:
+            return self._pages.get(title)
+
+    def as_page(self, ref):
+        """Render a PageRef in the shape of a v2 page search result."""
+        return {
+            "id": ref.id,
+            "title": ref.title,
+            "spaceId": self.space_id,
+            "parentId": ref.parent_id,
+            "version": {"number": ref.version},
+        }
+
+    def update_from_response(self, page, parent_id=None):
+        """Record the id/version returned by a v2 or v1 create/update call."""
+        if not page or not page.get("id") or not page.get("title"):
+            return None
+        with self._lock:
+            previous = self._pages.get(page["title"])
+            ref = self._ref_from(page, parent_id or (previous.parent_id if previous else None))
+            self._pages[ref.title] = ref
+        return ref
+
+    def labels_for(self, page_id):
+        """Labels last seen on/applied to a page this run, or None if unknown."""
+        with self._lock:
+            labels = self._labels.get(str(page_id))
+        return set(labels) if labels is not None else None
+
+    def set_labels(self, page_id, labels):
+        with self._lock:
+            self._labels[str(page_id)] = frozenset(labels)
+
+    def remove(self, title):
+        with self._lock:
+            self._pages.pop(title, None)
+
+    def __contains__(self, title):
+        return title in self._pages
+
+    def __len__(self):
+        return len(self._pages)
+
+    @staticmethod
+    def _ref_from(page, parent_id=None):
+        parent = page.get("parentId")
+        if not parent and page.get("ancestors"):
+            parent = page["ancestors"][-1].get("id")
+        return PageRef(
+            id=str(page["id"]),
+            title=page["title"],
+            version=(page.get("version") or {}).get("number", 1),
+            parent_id=str(parent or parent_id or ""),
+        )
@@ -0,0 +1,203 @@
+"""
+Per-run performance recorder.
+
+Phases (wall time of the big steps), timings (CLI subprocesses, parsing,
+body builders) and every HTTP request sent through the shared adapter are
+collected in-process and written as one JSON report to config.LOG_DIR at the
+end of a run:
+
+    with perf.phase("retrieve"):
+        ...
+    with perf.timer("cli", "sf project retrieve"):
+        ...
+    @perf.timed("render")
+    def _build_full_body(...): ...
+
+    perf.write_report("mainflow")
+
+RECORDER.reset() starts a new run. Work done in other processes
+(FLOW_PARSE_WORKERS > 1) is not recorded.
+"""
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+import config
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+MAX_SAMPLES = 10000  # per histogram, for percentiles
+
+_ID_RE = re.compile(r"/\d+(?=/|$)")
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self._samples = []
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, ms)
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+        if len(self._samples) < MAX_SAMPLES:
+            self._samples.append(ms)
+
+    def as_dict(self):
+        samples = sorted(self._samples)
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 2) if samples else 0.0
+
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 2) if self.count else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "max_ms": round(self.max, 2),
+            "histogram": {l: n for l, n in zip(labels, self.buckets) if n},
+        }
+
+
+class PerfRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._t0 = time.perf_counter()
+            self.phases = {}
+            self.timings = {}
+            self.endpoints = {}
+            self.statuses = {}
+            self.bytes_sent = 0
+            self.bytes_received = 0
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            entry = self.phases.setdefault(name, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+
+    def add_timing(self, category, key, seconds):
+        with self._lock:
+            self.timings.setdefault(category, {}).setdefault(key, Histogram()).add(seconds)
+
+    def add_http(self, method, url, status, seconds, sent, received):
+        endpoint = f"{method} {endpoint_of(url)}"
+        with self._lock:
+            self.endpoints.setdefault(endpoint, Histogram()).add(seconds)
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def report(self, name, extra=None):
+        with self._lock:
+            report = {
+                "run": name,
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "wall_s": round(time.perf_counter() - self._t0, 3),
+                "phases": {k: {"count": v["count"], "seconds": round(v["seconds"], 3)}
+                           for k, v in self.phases.items()},
+                "http": {
+                    "requests": sum(h.count for h in self.endpoints.values()),
+                    "bytes_sent": self.bytes_sent,
+                    "bytes_received": self.bytes_received,
+                    "statuses": dict(self.statuses),
+                    "endpoints": {k: h.as_dict() for k, h in sorted(self.endpoints.items())},
+                },
+                "timings": {cat: {k: h.as_dict() for k, h in sorted(items.items())}
+                            for cat, items in self.timings.items()},
+            }
+        if extra:
+            report.update(extra)
+        return report
+
+
+RECORDER = PerfRecorder()
+
+
+def endpoint_of(url):
+    """Path with numeric ids collapsed, e.g. /wiki/api/v2/pages/{id}."""
+    path = url.split("://", 1)[-1]
+    path = path[path.find("/"):] if "/" in path else "/"
+    return _ID_RE.sub("/{id}", path.split("?", 1)[0])
+
+
+@contextmanager
+def phase(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        RECORDER.add_phase(name, time.perf_counter() - t0)
+
+
+@contextmanager
+def timer(category, key):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        RECORDER.add_timing(category, key, time.perf_counter() - t0)
+
+
+def timed(category, key=None):
+    """Decorator form of timer(); key defaults to the function's qualified name."""
+    def decorate(func):
+        name = key or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                RECORDER.add_timing(category, name, time.perf_counter() - t0)
+        return wrapper
+    return decorate
+
+
+def cli_key(cmd):
+    """Group CLI timings by command, e.g. 'sf sobject describe'."""
+    words = [os.path.basename(str(cmd[0]))] if cmd else []
+    for arg in cmd[1:]:
+        if str(arg).startswith("-") or len(words) >= 3:
+            break
+        words.append(str(arg))
+    return " ".join(words)
+
+
+def write_report(name, extra=None):
+    """Write the JSON report to LOG_DIR/perf_<name>_<timestamp>.json and return its path."""
+    if not config.PERF_REPORT:
+        return None
+    report = RECORDER.report(name, extra)
+    stamp = datetime.fromtimestamp(RECORDER.started).strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(config.LOG_DIR, f"perf_{name}_{stamp}.json")
+    try:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write performance report {path}: {e}")
+        return None
+    phases = ", ".join(f"{k} {v['seconds']}s" for k, v in report["phases"].items())
+    logger.info(f"⏱️ Performance report: {path} ({phases})")
+    return path
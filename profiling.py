@@ -0,0 +1,147 @@
+"""
+Opt-in CPU and memory profiling for a sync run (PROFILE=true or --profile).
+
+    with profiling.session("mainflow", enabled=args.profile):
+        ...
+        profiling.checkpoint("after_retrieve")
+
+While a session is active every thread started by the run (upload workers
+included) is profiled: before Python 3.12 each thread gets its own cProfile
+profiler and they are merged, from 3.12 on cProfile is process-wide (built on
+sys.monitoring, which allows one active profiler) so a single one covers all
+threads. Either way the result is one LOG_DIR/profile_<run>_<timestamp>.prof
+file, with a text summary next to it.
+checkpoint() takes a tracemalloc snapshot and writes the top allocation
+sites plus the growth since the previous checkpoint. Outside a session
+checkpoint() does nothing.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+import config
+
+logger = logging.getLogger(__name__)
+
+# 3.12+: one cProfile.Profile sees every thread and a second enable() raises
+PER_THREAD = sys.version_info < (3, 12)
+
+_active = None
+
+
+class Profiler:
+    def __init__(self, name, top=None, frames=None):
+        self.name = name
+        self.top = top or config.PROFILE_TOP
+        self.frames = frames or config.PROFILE_FRAMES
+        self.prefix = os.path.join(
+            config.LOG_DIR, f"profile_{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._last_snapshot = None
+        self._started_tracemalloc = False
+
+    def _new_profile(self):
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+        return profile
+
+    def _thread_hook(self, *_):
+        # First profile event in a new thread: hand the thread to cProfile,
+        # whose enable() replaces this hook for that thread.
+        self._new_profile()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+        if PER_THREAD:
+            threading.setprofile(self._thread_hook)
+        self._main = self._new_profile()
+        logger.info(f"🔬 Profiling enabled, writing {self.prefix}.*")
+        return self
+
+    def stop(self):
+        if PER_THREAD:
+            threading.setprofile(None)
+        self._main.disable()
+        self.checkpoint("end")
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        if stats is None:
+            return
+        stats.dump_stats(f"{self.prefix}.prof")
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stats.sort_stats("tottime").print_stats(self.top)
+        self._write("cpu", out.getvalue())
+        scope = f"{len(profiles)} thread(s)" if PER_THREAD else "all threads"
+        logger.info(f"🔬 CPU profile of {scope}: {self.prefix}.prof")
+
+    def checkpoint(self, label):
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"{label}: current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB", ""]
+        lines.append(f"Top {self.top} allocation sites:")
+        lines += [str(s) for s in snapshot.statistics("lineno")[:self.top]]
+        if self._last_snapshot is not None:
+            lines += ["", f"Top {self.top} changes since previous checkpoint:"]
+            lines += [str(s) for s in snapshot.compare_to(self._last_snapshot, "lineno")[:self.top]]
+        self._last_snapshot = snapshot
+        self._write(f"mem_{label}", "\n".join(lines) + "\n")
+        logger.info(f"🔬 Memory at {label}: {current / 1024 / 1024:.1f} MB (peak {peak / 1024 / 1024:.1f} MB)")
+
+    def _write(self, suffix, text):
+        try:
+            with open(f"{self.prefix}_{suffix}.txt", "w", encoding="utf-8") as fh:
+                fh.write(text)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write profile report: {e}")
+
+
+@contextmanager
+def session(name, enabled=False):
+    """Profile the enclosed run when `enabled` (the --profile flag) or PROFILE is set."""
+    global _active
+    if not (enabled or config.PROFILE) or _active is not None:
+        yield None
+        return
+    _active = Profiler(name).start()
+    try:
+        yield _active
+    finally:
+        profiler, _active = _active, None
+        profiler.stop()
+
+
+def checkpoint(label):
+    """Memory snapshot at a phase boundary (no-op unless profiling)."""
+    if _active is not None:
+        _active.checkpoint(label)
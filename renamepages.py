@@ -1,7 +1,7 @@
 import os
-import requests
 from requests.auth import HTTPBasicAuth
 import config
+from http_session import get_session
 
 BASE_URL = f"https://{config.CONFLUENCE_DOMAIN}"
 EMAIL = config.CONFLUENCE_EMAIL
@@ -17,7 +17,7 @@ def get_headers():
 def get_page(page_id):
     """Fetch full page data including body and version."""
     url = f"{BASE_URL}/wiki/api/v2/pages/{page_id}?body-format=storage"
-    resp = requests.get(url, auth=HTTPBasicAuth(EMAIL, TOKEN))
+    resp = get_session().get(url, auth=HTTPBasicAuth(EMAIL, TOKEN))
     resp.raise_for_status()
     return resp.json()
 
@@ -26,7 +26,7 @@ def find_prefixed_pages():
     """Find all pages that start with 'Flow Documentation:' under the Admin Docs parent."""
     url = f"{BASE_URL}/wiki/api/v2/pages?spaceId={SPACE_ID}&parentId={PARENT_ID}&limit=250"
     print(f"DEBUG find_page_by_title URL: {url}")
-    resp = requests.get(url, headers=get_headers(), auth=HTTPBasicAuth(EMAIL, TOKEN))
+    resp = get_session().get(url, headers=get_headers(), auth=HTTPBasicAuth(EMAIL, TOKEN))
     resp.raise_for_status()
     pages = resp.json().get("results", [])
     return [p for p in pages if p["title"].startswith("Flow Documentation:")]
@@ -56,7 +56,7 @@ def rename_page(page_id, new_title):
         ]
     }
 
-    resp = requests.put(url, json=payload, auth=HTTPBasicAuth(EMAIL, TOKEN))
+    resp = get_session().put(url, json=payload, auth=HTTPBasicAuth(EMAIL, TOKEN))
     resp.raise_for_status()
     return resp.json()
 
@@ -0,0 +1,119 @@
+"""
+Append-only journal of a sync run, so an interrupted run can be resumed.
+
+Every line is one JSON record naming an item (flow API name or object name),
+the stage it just completed and, once it has one, its page id and version:
+
+    {"ts": "...", "item": "Account", "stage": "uploaded", "page_id": "123", "version": 4}
+
+Stages, in order: fetched, parsed, rendered, uploaded, labelled. A run started
+without resume truncates the journal. With resume the records are read back
+and items that reached the journal's final stage are skipped. A run that ends
+without failures appends a "finished" record; resuming a finished journal
+starts over.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+import config
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetched", "parsed", "rendered", "uploaded", "labelled")
+
+
+class RunJournal:
+    def __init__(self, path, final_stage="labelled", resume=False):
+        self.path = path
+        self.final_stage = final_stage
+        self.resumed = False
+        self._lock = threading.Lock()
+        self._items = {}
+        if resume:
+            self._load()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fh = open(self.path, "a" if self.resumed else "w", encoding="utf-8")
+        if self.resumed and self._fh.tell() and not self._ends_with_newline():
+            self._fh.write("\n")  # a torn last line from the interrupted run
+        self._append({"event": "start", "resume": self.resumed})
+        if self.resumed:
+            done = sum(1 for item in self._items if self.done(item))
+            logger.info(f"♻️ Resuming from {self.path}: {done} item(s) already complete")
+
+    @classmethod
+    def from_config(cls, name, final_stage="labelled", resume=False):
+        return cls(os.path.join(config.STATE_DIR, f"{name}_journal.jsonl"), final_stage, resume)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            logger.info(f"♻️ No journal at {self.path}, starting a full run")
+            return
+        items = {}
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("event") == "finished":
+                    items = {}
+                    continue
+                item = rec.get("item")
+                if item and rec.get("stage") in STAGES:
+                    entry = items.setdefault(item, {"stages": set()})
+                    entry["stages"].add(rec["stage"])
+                    entry.update((k, v) for k, v in rec.items() if k not in ("item", "stage", "ts"))
+        if not items:
+            logger.info(f"♻️ Nothing to resume in {self.path}, starting a full run")
+            return
+        self._items = items
+        self.resumed = True
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) == b"\n"
+
+    def _append(self, rec):
+        rec = {"ts": datetime.now().isoformat(timespec="seconds"), **rec}
+        self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def record(self, item, stage, page_id=None, version=None, **extra):
+        """Note that `item` completed `stage` (page_id/version once known)."""
+        rec = {"item": item, "stage": stage, **extra}
+        if page_id is not None:
+            rec["page_id"] = str(page_id)
+        if version is not None:
+            rec["version"] = version
+        with self._lock:
+            entry = self._items.setdefault(item, {"stages": set()})
+            entry["stages"].add(stage)
+            entry.update((k, v) for k, v in rec.items() if k not in ("item", "stage"))
+            self._append(rec)
+
+    def has(self, item, stage):
+        with self._lock:
+            entry = self._items.get(item)
+            return bool(entry) and stage in entry["stages"]
+
+    def done(self, item):
+        return self.has(item, self.final_stage)
+
+    def get(self, item, key, default=None):
+        with self._lock:
+            return self._items.get(item, {}).get(key, default)
+
+    def items_at(self, stage):
+        """Items that completed `stage`, mapped to their recorded details."""
+        with self._lock:
+            return {item: dict(entry) for item, entry in self._items.items() if stage in entry["stages"]}
+
+    def finish(self, complete):
+        """Close the journal; a complete run is marked finished so it isn't resumed."""
+        with self._lock:
+            if complete:
+                self._append({"event": "finished"})
+            self._fh.close()
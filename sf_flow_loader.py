@@ -1,47 +1,137 @@
 import subprocess
 import os
+import json
 import logging
-import tempfile
-import shutil
-from dotenv import load_dotenv
+import threading
+import config
+import perf
+from dx_workspace import get_workspace
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 def run_cmd(cmd, cwd=None):
     """Helper to run CLI commands and raise if they fail"""
     logger.info(f"🔎 Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    with perf.timer("cli", perf.cli_key(cmd)):
+        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
     if result.returncode != 0:
         raise RuntimeError(f"sf CLI failed: {result.stderr}")
     return result
 
-def retrieve_flows():
-    """Retrieve all flows using a temporary Salesforce DX project"""
+FLOW_QUERY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "flow_query.txt")
+RETRIEVE_BATCH_SIZE = 50  # flows per `project retrieve` call (keeps command lines short)
+
+
+class FlowWatermark:
+    """
+    Last uploaded ActiveVersion.LastModifiedDate per flow DeveloperName.
+    Stamps from the current query stay pending until confirm() is called for
+    a flow that uploaded successfully, so failures are retried next run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._stamps = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    self._stamps = json.load(fh)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable flow watermark {path}: {e}")
+
+    @classmethod
+    def from_config(cls):
+        org = (os.getenv("SF_ORG_ALIAS") or "default").replace(os.sep, "_")
+        return cls(os.path.join(config.STATE_DIR, f"flow_watermark_{org}.json"))
+
+    def changed(self, versions):
+        """Return DeveloperNames whose stamp differs from the watermark."""
+        changed = sorted(n for n, stamp in versions.items() if self._stamps.get(n) != stamp)
+        with self._lock:
+            self._pending.update({n: versions[n] for n in changed})
+        return changed
+
+    def confirm(self, developer_name):
+        with self._lock:
+            if developer_name in self._pending:
+                self._stamps[developer_name] = self._pending.pop(developer_name)
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self._stamps, fh, sort_keys=True, indent=0)
+            os.replace(tmp, self.path)
+
+
+def query_flow_versions(cli, org):
+    """Run flow_query.txt once and map DeveloperName -> ActiveVersion.LastModifiedDate."""
+    with open(FLOW_QUERY_FILE, encoding="utf-8") as fh:
+        query = fh.read().strip()
+    result = run_cmd([cli, "data", "query", "-q", query, "--use-tooling-api", "--json", "-o", org])
+    records = json.loads(result.stdout).get("result", {}).get("records", [])
+    versions = {}
+    for rec in records:
+        name = rec.get("DeveloperName")
+        if name:
+            versions[name] = (rec.get("ActiveVersion") or {}).get("LastModifiedDate") or ""
+    return versions
+
+
+def retrieve_flows(watermark=None, workspace=None):
+    """
+    Retrieve flows into the persistent Salesforce DX workspace.
+    With a FlowWatermark only flows changed since the last run are retrieved
+    (by name) and returned.
+    """
+    if config.LOCAL_FLOW_DIR:
+        flow_files = _collect_flow_files(config.LOCAL_FLOW_DIR)
+        logger.info(f"📁 Using {len(flow_files)} local flow files from {config.LOCAL_FLOW_DIR}")
+        return flow_files
+
     cli = os.getenv("SF_CLI")
     org = os.getenv("SF_ORG_ALIAS")
 
-    # 1. Create temp folder + DX project
-    temp_dir = tempfile.mkdtemp(prefix="sfproj_")
-    logger.info(f"📂 Created temp DX project folder: {temp_dir}")
-
-    run_cmd([cli, "project", "generate", "--name", "tempProj"], cwd=temp_dir)
+    names = None
+    if watermark is not None:
+        versions = query_flow_versions(cli, org)
+        names = watermark.changed(versions)
+        logger.info(f"🔁 {len(names)} of {len(versions)} flows changed since last run")
+        if not names:
+            return []
 
-    proj_dir = os.path.join(temp_dir, "tempProj")
+    workspace = workspace or get_workspace()
+    with workspace.lock():
+        # 1. Reuse the persistent DX project (generated on first run only)
+        proj_dir = workspace.ensure()
 
-    # 2. Retrieve all flows
-    run_cmd([cli, "project", "retrieve", "start", "-m", "Flow", "-o", org], cwd=proj_dir)
+        # 2. Retrieve all flows, or only the changed ones by name
+        if names is None:
+            workspace.clear_flows()
+            run_cmd([cli, "project", "retrieve", "start", "-m", "Flow", "-o", org], cwd=proj_dir)
+        else:
+            for start in range(0, len(names), RETRIEVE_BATCH_SIZE):
+                batch = names[start:start + RETRIEVE_BATCH_SIZE]
+                metadata = ",".join(f"Flow:{n}" for n in batch)
+                run_cmd([cli, "project", "retrieve", "start", "-m", metadata, "-o", org], cwd=proj_dir)
 
     # 3. Collect all .flow-meta.xml files
-    flow_dir = os.path.join(proj_dir, "force-app", "main", "default", "flows")
+    flow_files = _collect_flow_files(workspace.flow_dir, set(names) if names is not None else None)
+    logger.info(f"✅ Retrieved {len(flow_files)} flow files")
+    return flow_files
+
+
+def _collect_flow_files(flow_dir, wanted=None):
     flow_files = []
     if os.path.exists(flow_dir):
         for root, _, files in os.walk(flow_dir):
             for file in files:
-                if file.endswith(".flow-meta.xml"):
-                    flow_files.append(os.path.join(root, file))
-
-    logger.info(f"✅ Retrieved {len(flow_files)} flow files")
-
-    # ⚠️ Keep temp project for now (remove shutil.rmtree(temp_dir) if you want cleanup)
+                if not file.endswith(".flow-meta.xml"):
+                    continue
+                if wanted is not None and file[:-len(".flow-meta.xml")] not in wanted:
+                    continue
+                flow_files.append(os.path.join(root, file))
     return flow_files
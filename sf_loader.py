@@ -1,11 +1,12 @@
 import subprocess
-import tempfile
 import os
-import shutil
 import json
 import logging
 from xml.etree import ElementTree as ET
+from flow_xml import extract_flow
+import perf
 import config  # ✅ so we can access DATA_SOURCE, SQL_QUERY, etc.
+from dx_workspace import DxWorkspace, get_workspace
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +14,8 @@ def run_cli(cli_path, args, cwd=None):
     """Run a Salesforce CLI command and return parsed JSON if available."""
     full_cmd = [cli_path] + args
     logger.debug("Running CLI: %s", " ".join(full_cmd))
-    proc = subprocess.run(full_cmd, cwd=cwd, capture_output=True, text=True)
+    with perf.timer("cli", perf.cli_key(full_cmd)):
+        proc = subprocess.run(full_cmd, cwd=cwd, capture_output=True, text=True)
     if proc.returncode != 0:
         raise RuntimeError(f"CLI command failed: {proc.stderr}")
     try:
@@ -24,45 +26,34 @@ def run_cli(cli_path, args, cwd=None):
 def parse_flow_metadata(xml_path):
     """Parse metadata from a Flow .flow-meta.xml file."""
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+        extracted = extract_flow(xml_path)
     except ET.ParseError as e:
         logger.warning("Failed to parse XML %s: %s", xml_path, e)
         return {}, []
 
-    ns = {"sf": "http://soap.sforce.com/2006/04/metadata"}
+    top = extracted["top"]
     meta = {}
-    fields = set()
 
     # Basic metadata
     meta["FlowName"] = os.path.splitext(os.path.basename(xml_path))[0]
-    meta["status"] = (root.findtext("sf:status", namespaces=ns) or "").strip()
-    meta["processType"] = (root.findtext("sf:processType", namespaces=ns) or "").strip()
-    meta["label"] = (root.findtext("sf:label", namespaces=ns) or "").strip()
+    meta["status"] = top.get("status", "")
+    meta["processType"] = top.get("processType", "")
+    meta["label"] = top.get("label", "")
 
-    # Collect field references
-    for tag in [
-        ".//sf:field",
-        ".//sf:fieldName",
-        ".//sf:object",
-        ".//sf:targetField",
-    ]:
-        for elem in root.findall(tag, ns):
-            if elem.text:
-                fields.add(elem.text.strip())
-
-    return meta, sorted(fields)
+    # Field references (sf:field, sf:fieldName, sf:object, sf:targetField)
+    return meta, sorted(extracted["refs"])
 
 def load_flows(cli_path, org_alias, logger):
     """Retrieve flows using Salesforce CLI and parse them."""
-    tempdir = tempfile.mkdtemp(prefix="sfproj_")
-    logger.debug("Created temp DX project at %s", tempdir)
+    workspace = get_workspace()
+    if workspace.cli != cli_path:
+        workspace = DxWorkspace(cli=cli_path)
 
-    try:
-        # Generate project
-        run_cli(cli_path, ["project", "generate", "-n", "tempProj"], cwd=tempdir)
-        projdir = os.path.join(tempdir, "tempProj")
-        logger.debug("Generated temporary project at %s", projdir)
+    with workspace.lock():
+        # Reuse the persistent project (generated on first use only)
+        projdir = workspace.ensure()
+        workspace.clear_flows()
+        logger.debug("Using DX project at %s", projdir)
 
         # Retrieve all Flows
         result_json = run_cli(cli_path, [
@@ -88,10 +79,6 @@ def load_flows(cli_path, org_alias, logger):
 
         return flows
 
-    finally:
-        shutil.rmtree(tempdir, ignore_errors=True)
-        logger.debug("Deleted temp DX project at %s", tempdir)
-
 def fetch_all():
     """Fetch flows either from SQL or Salesforce CLI depending on DATA_SOURCE."""
     if config.DATA_SOURCE == "SQL":
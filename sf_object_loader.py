@@ -2,14 +2,20 @@ import subprocess
 import json
 import logging
 import config
+import perf
 import os
 
 logger = logging.getLogger(__name__)
 
-def run_cli(cmd):
+def run_cli(cmd, timeout=None):
     """Run a Salesforce CLI command and return parsed JSON."""
     logger.debug("Running CLI: %s", " ".join(cmd))
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        with perf.timer("cli", perf.cli_key(cmd)):
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.error("CLI command timed out after %ss", timeout)
+        return None
     if result.returncode != 0:
         logger.error("CLI command failed: %s", result.stderr)
         return None
@@ -44,7 +50,7 @@ def fetch_all():
         if org:
             cmd_list.extend(["-o", org])  # sf uses -o instead of -u
 
-    resp = run_cli(cmd_list)
+    resp = run_cli(cmd_list, timeout=config.SF_CLI_TIMEOUT)
     if not resp or "result" not in resp:
         return []
 
@@ -0,0 +1,138 @@
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import config
+from auth import get_access_token_and_instance
+from http_session import get_session
+
+logger = logging.getLogger(__name__)
+
+# Composite API limit on subrequests per call
+COMPOSITE_BATCH_SIZE = 25
+
+
+class SalesforceRestClient:
+    """
+    Minimal Salesforce REST client used instead of spawning one `sf` process
+    per call. The instance URL is injectable so it can point at a local
+    stand-in server.
+    """
+
+    def __init__(self, instance_url: str, access_token: str,
+                 api_version: Optional[str] = None, session=None):
+        self.instance_url = instance_url.rstrip("/")
+        self.api_version = api_version or config.SF_API_VERSION
+        self.session = session or get_session()
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+        }
+
+    @classmethod
+    def from_cli(cls, session=None) -> "SalesforceRestClient":
+        """Build a client from the token the sf CLI already holds for the org."""
+        token, instance = get_access_token_and_instance()
+        return cls(instance, token, session=session)
+
+    @property
+    def data_path(self) -> str:
+        return f"/services/data/v{self.api_version}"
+
+    def get(self, path: str, params=None, headers=None):
+        merged = dict(self.headers, **(headers or {}))
+        return self.session.get(f"{self.instance_url}{path}", params=params, headers=merged)
+
+    def list_sobjects(self) -> Dict[str, Any]:
+        """Global describe (same payload the CLI returns under `result`)."""
+        r = self.get(f"{self.data_path}/sobjects")
+        r.raise_for_status()
+        return r.json()
+
+    def list_sobjects_if_modified(self, since: Optional[str]):
+        """
+        Global describe with If-Modified-Since. Returns (payload, last_modified);
+        payload is None when Salesforce answers 304 Not Modified.
+        """
+        headers = {"If-Modified-Since": since} if since else None
+        r = self.get(f"{self.data_path}/sobjects", headers=headers)
+        if r.status_code == 304:
+            return None, since
+        r.raise_for_status()
+        return r.json(), r.headers.get("Last-Modified") or r.headers.get("Date")
+
+    def tooling_query(self, soql: str) -> List[Dict[str, Any]]:
+        """Run a Tooling API query, following nextRecordsUrl."""
+        records: List[Dict[str, Any]] = []
+        r = self.get(f"{self.data_path}/tooling/query", params={"q": soql})
+        while True:
+            r.raise_for_status()
+            data = r.json()
+            records.extend(data.get("records", []))
+            next_url = data.get("nextRecordsUrl")
+            if data.get("done", True) or not next_url:
+                return records
+            r = self.get(next_url)
+
+    def object_change_stamps(self) -> Dict[str, str]:
+        """
+        Latest metadata change per sObject: max of EntityDefinition and
+        CustomField LastModifiedDate (ISO timestamps compare lexically).
+        """
+        entities = self.tooling_query(
+            "SELECT QualifiedApiName, DurableId, LastModifiedDate FROM EntityDefinition"
+        )
+        stamps: Dict[str, str] = {}
+        by_durable_id: Dict[str, str] = {}
+        for e in entities:
+            name = e.get("QualifiedApiName")
+            if not name:
+                continue
+            stamps[name] = e.get("LastModifiedDate") or ""
+            if e.get("DurableId"):
+                by_durable_id[e["DurableId"]] = name
+
+        for f in self.tooling_query("SELECT TableEnumOrId, LastModifiedDate FROM CustomField"):
+            table = f.get("TableEnumOrId") or ""
+            # Custom objects are referenced by their 01I id, standard ones by name
+            name = by_durable_id.get(table, table)
+            modified = f.get("LastModifiedDate") or ""
+            if name and modified > stamps.get(name, ""):
+                stamps[name] = modified
+        return stamps
+
+    def describe_many(self, names: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Describe sObjects in Composite batches; failed describes map to None."""
+        return dict(self.iter_describes(names))
+
+    def iter_describes(self, names: Iterable[str]) -> Iterator[tuple]:
+        names = list(names)
+        for start in range(0, len(names), COMPOSITE_BATCH_SIZE):
+            yield from self._describe_batch(names[start:start + COMPOSITE_BATCH_SIZE])
+
+    def _describe_batch(self, names: List[str]) -> Iterator[tuple]:
+        subrequests = [
+            {
+                "method": "GET",
+                "url": f"{self.data_path}/sobjects/{name}/describe",
+                "referenceId": f"d{i}",
+            }
+            for i, name in enumerate(names)
+        ]
+        r = self.session.post(
+            f"{self.instance_url}{self.data_path}/composite",
+            json={"allOrNone": False, "compositeRequest": subrequests},
+            headers=self.headers,
+        )
+        if r.status_code != 200:
+            logger.error("Composite describe failed (%s): %s", r.status_code, r.text[:500])
+            for name in names:
+                yield name, None
+            return
+
+        by_ref = {sub.get("referenceId"): sub for sub in r.json().get("compositeResponse", [])}
+        for i, name in enumerate(names):
+            sub = by_ref.get(f"d{i}") or {}
+            if sub.get("httpStatusCode") == 200:
+                yield name, sub.get("body")
+            else:
+                logger.error("Describe failed for %s: %s", name, sub.get("body"))
+                yield name, None
@@ -1,21 +1,25 @@
 import subprocess
 import logging
+import config
+import perf
 
 logger = logging.getLogger(__name__)
 
-def run_cli(cmd):
+def run_cli(cmd, timeout=None):
     """
     Run a Salesforce CLI command with debug logging and error handling.
     """
     logger.info("⚡ Running CLI: %s", " ".join(cmd))
 
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False
-        )
+        with perf.timer("cli", perf.cli_key(cmd)):
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=timeout
+            )
 
         if result.stdout.strip():
             logger.info("STDOUT:\n%s", result.stdout.strip())
@@ -29,6 +33,10 @@ def run_cli(cmd):
 
         return result.stdout.strip()
 
+    except subprocess.TimeoutExpired:
+        logger.error("⏱ CLI command timed out after %ss", timeout)
+        return None
+
     except Exception as e:
         logger.exception("💥 Exception while running CLI: %s", e)
         return None
@@ -45,7 +53,7 @@ def fetch_rules(object_name, org_alias="Prod"):
         "-o", org_alias
     ]
 
-    output = run_cli(cmd)
+    output = run_cli(cmd, timeout=config.SF_CLI_TIMEOUT)
 
     if output is None:
         logger.warning("⚠️ No validation rules could be fetched for %s", object_name)
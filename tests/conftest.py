@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Settings are resolved once per process: keep state and reports out of the tree
+os.environ.setdefault("STATE_DIR", os.path.join(ROOT, ".pytest_cache", "state"))
+os.environ.setdefault("PERF_REPORT", "false")
+
+from confluence_standin import ConfluenceStandIn  # noqa: E402
+
+FLOW_DIR = os.path.join(ROOT, "sf_project", "force-app", "main", "default", "flows")
+
+
+@pytest.fixture
+def standin():
+    with ConfluenceStandIn() as server:
+        yield server
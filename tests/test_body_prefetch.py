@@ -0,0 +1,72 @@
+import requests
+
+from body_prefetch import BodyPrefetcher
+
+BULK = "GET /wiki/api/v2/pages"
+
+
+def _pages(standin, n):
+    return [standin.add_page(f"Page {i}", "1", f"<p>body {i}</p>") for i in range(n)]
+
+
+def _prefetcher(standin, **kwargs):
+    return BodyPrefetcher(standin.base_url, None, "storage", session=requests.Session(), **kwargs)
+
+
+def test_planned_pages_are_fetched_in_batches(standin):
+    pages = _pages(standin, 10)
+    prefetcher = _prefetcher(standin, batch_size=4, max_entries=20)
+    prefetcher.plan(p["id"] for p in pages)
+    for i, page in enumerate(pages):
+        got = prefetcher.get(page["id"])
+        assert got["title"] == f"Page {i}"
+        assert got["body"]["storage"]["value"] == f"<p>body {i}</p>"
+        assert got["version"]["number"] == page["version"]["number"]
+    assert standin.stats[BULK] == 3
+    assert (prefetcher.hits, prefetcher.misses, prefetcher.requests) == (10, 0, 3)
+
+
+def test_out_of_order_get_fetches_that_page_first(standin):
+    pages = _pages(standin, 6)
+    prefetcher = _prefetcher(standin, batch_size=3, max_entries=20)
+    prefetcher.plan(p["id"] for p in pages)
+    assert prefetcher.get(pages[5]["id"]) is not None
+    # the batch was pages 5, 0, 1; pages 0 and 1 are served from the cache
+    assert prefetcher.get(pages[0]["id"]) is not None
+    assert prefetcher.get(pages[1]["id"]) is not None
+    assert standin.stats[BULK] == 1
+
+
+def test_misses_fall_back_to_none(standin):
+    pages = _pages(standin, 3)
+    prefetcher = _prefetcher(standin, batch_size=5, max_entries=20)
+    prefetcher.plan([pages[0]["id"], pages[1]["id"]])
+    prefetcher.discard(pages[1]["id"])
+    assert prefetcher.get(pages[2]["id"]) is None  # never planned
+    assert prefetcher.get(pages[0]["id"]) is not None
+    assert prefetcher.get(pages[0]["id"]) is None  # handed out once
+    assert prefetcher.get(pages[1]["id"]) is None  # discarded
+    assert standin.stats[BULK] == 1
+    assert (prefetcher.hits, prefetcher.misses) == (1, 3)
+
+
+def test_requested_page_is_returned_from_a_large_batch(standin):
+    pages = _pages(standin, 6)
+    prefetcher = _prefetcher(standin, batch_size=6, max_entries=2)
+    assert prefetcher.cache.max_entries == 6  # never below one batch
+    prefetcher.plan(p["id"] for p in pages)
+    assert all(prefetcher.get(p["id"]) is not None for p in pages)
+    assert prefetcher.cache.evicted == 0
+    assert standin.stats[BULK] == 1
+
+
+def test_pages_evicted_by_a_later_batch_are_misses(standin):
+    pages = _pages(standin, 9)
+    prefetcher = _prefetcher(standin, batch_size=3, max_entries=3)
+    prefetcher.plan(p["id"] for p in pages)
+    assert prefetcher.get(pages[0]["id"]) is not None  # caches 1, 2
+    assert prefetcher.get(pages[8]["id"]) is not None  # caches 3, 4 and evicts 1
+    assert prefetcher.get(pages[1]["id"]) is None
+    assert prefetcher.get(pages[2]["id"]) is not None
+    assert prefetcher.cache.evicted == 1
+    assert standin.stats[BULK] == 2
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import config
+from dx_workspace import DxWorkspace, WorkspaceLocked
+
+
+def _lock(tmp_path, pid, age=0):
+    path = tmp_path / DxWorkspace.LOCK_FILE
+    path.write_text(str(pid), encoding="utf-8")
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return str(path)
+
+
+@pytest.fixture
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+@pytest.mark.skipif(os.name != "posix", reason="owner is only probed on POSIX")
+def test_old_lock_of_a_live_run_is_kept(tmp_path):
+    path = _lock(tmp_path, os.getpid(), age=config.DX_LOCK_STALE_SECONDS + 60)
+    assert not DxWorkspace._is_stale(path)
+    with pytest.raises(WorkspaceLocked):
+        with DxWorkspace(root=str(tmp_path)).lock(timeout=0):
+            pass
+
+
+@pytest.mark.skipif(os.name != "posix", reason="owner is only probed on POSIX")
+def test_lock_of_a_dead_run_is_taken_over(tmp_path, dead_pid):
+    path = _lock(tmp_path, dead_pid)
+    assert DxWorkspace._is_stale(path)
+    with DxWorkspace(root=str(tmp_path)).lock(timeout=0):
+        assert open(path, encoding="utf-8").read() == str(os.getpid())
+    assert not os.path.exists(path)
+
+
+def test_age_decides_without_a_pid(tmp_path):
+    assert not DxWorkspace._is_stale(_lock(tmp_path, "", age=60))
+    assert DxWorkspace._is_stale(_lock(tmp_path, "", age=config.DX_LOCK_STALE_SECONDS + 60))
@@ -0,0 +1,84 @@
+import itertools
+import os
+import shutil
+
+import pytest
+
+import flow_cache
+from conftest import FLOW_DIR
+from flow_cache import FlowParseCache
+from flow_parser import parse_flow_file
+
+
+@pytest.fixture
+def flows(tmp_path):
+    names = sorted(f for f in os.listdir(FLOW_DIR) if f.endswith(".flow-meta.xml"))[:3]
+    paths = []
+    for name in names:
+        shutil.copy(os.path.join(FLOW_DIR, name), tmp_path / name)
+        paths.append(str(tmp_path / name))
+    return paths
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(flow_cache.time, "time", lambda: float(next(ticks)))
+
+
+def _cached(cache_path, flow):
+    cache = FlowParseCache(cache_path, max_entries=10)
+    _, hit, _ = cache.lookup(flow)
+    cache.close()
+    return hit is not None
+
+
+def test_hit_matches_a_fresh_parse(tmp_path, flows):
+    path = str(tmp_path / "cache.sqlite")
+    cache = FlowParseCache(path)
+    first = cache.parse(flows[0])
+    again = cache.parse(flows[0])
+    cache.close()
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert again == first == parse_flow_file(flows[0])
+
+
+def test_evicts_least_recently_used(tmp_path, flows, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = FlowParseCache(path, max_entries=2)
+    for flow in flows:
+        cache.parse(flow)
+    cache.lookup(flows[0])  # the oldest entry is used again
+    cache.close()
+
+    assert _cached(path, flows[0])
+    assert not _cached(path, flows[1])
+    assert _cached(path, flows[2])
+
+
+def test_other_parser_version_is_ignored_and_purged(tmp_path, flows, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    cache = FlowParseCache(path)
+    cache.parse(flows[0])
+    cache.close()
+
+    monkeypatch.setattr(flow_cache, "PARSER_VERSION", "next")
+    cache = FlowParseCache(path)
+    count = cache._conn.execute("SELECT COUNT(*) FROM flows").fetchone()[0]
+    _, hit, _ = cache.lookup(flows[0])
+    cache.close()
+    assert count == 0
+    assert hit is None
+
+
+def test_renamed_file_keeps_its_own_path_keys(tmp_path, flows):
+    path = str(tmp_path / "cache.sqlite")
+    cache = FlowParseCache(path)
+    cache.parse(flows[0])
+    copy = str(tmp_path / "Renamed_Copy.flow-meta.xml")
+    shutil.copy(flows[0], copy)
+    flow = cache.parse(copy)
+    cache.close()
+    assert cache.hits == 1
+    assert flow["file"] == copy
+    assert flow["developerName"] == "Renamed_Copy"
@@ -0,0 +1,71 @@
+import pytest
+import requests
+
+import http_session
+from http_session import PooledAdapter, connection_stats
+
+
+def _session(**kwargs):
+    session = requests.Session()
+    session.mount("http://", PooledAdapter(timeout=5, rate_limit=0, backoff_base=0, backoff_max=0, **kwargs))
+    return session
+
+
+def _counters(session):
+    return session.get_adapter("http://").counters
+
+
+def _create(session, standin, title):
+    return session.post(f"{standin.base_url}/wiki/api/v2/pages",
+                        json={"title": title, "parentId": "1", "body": {"value": ""}})
+
+
+def test_503_is_retried_for_idempotent_methods(standin):
+    page = standin.add_page("Page", "1")
+    standin.error_rate = 1.0
+    session = _session(retries=2)
+    assert session.get(f"{standin.base_url}/wiki/api/v2/pages/{page['id']}").status_code == 503
+    assert session.put(f"{standin.base_url}/wiki/api/v2/pages/{page['id']}", json={}).status_code == 503
+    assert standin.stats["503"] == 6
+    assert _counters(session)["retries"] == 4
+    assert _counters(session)["gave_up"] == 2
+
+
+def test_503_is_not_retried_for_post(standin):
+    standin.error_rate = 1.0
+    session = _session(retries=5)
+    assert _create(session, standin, "Page").status_code == 503
+    assert standin.stats["503"] == 1
+    assert _counters(session)["retries"] == 0
+    assert standin.find("Page") is None
+
+
+def test_429_is_retried_for_post(standin):
+    standin.throttle_rate = 1.0
+    standin.retry_after = 0
+    session = _session(retries=3)
+    assert _create(session, standin, "Page").status_code == 429
+    assert standin.stats["429"] == 4
+
+
+def test_flaky_gets_eventually_succeed(standin):
+    page = standin.add_page("Page", "1")
+    standin.error_rate = 0.5
+    session = _session(retries=20)
+    for _ in range(10):
+        r = session.get(f"{standin.base_url}/wiki/api/v2/pages/{page['id']}")
+        assert r.status_code == 200
+    assert _counters(session)["retries"] == standin.stats["503"] > 0
+
+
+def test_shared_session_reuses_connections(standin, monkeypatch):
+    monkeypatch.setattr(http_session, "_session", None)
+    session = http_session.get_session()
+    assert http_session.get_session() is session
+    page = standin.add_page("Page", "1")
+    for _ in range(5):
+        session.get(f"{standin.base_url}/wiki/api/v2/pages/{page['id']}").raise_for_status()
+    stats = connection_stats(session)
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+    assert stats["reused"] == 4
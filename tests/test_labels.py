@@ -0,0 +1,42 @@
+import requests
+
+from labels import LabelSync
+from page_index import PageIndex
+
+
+def _sync(standin, **kwargs):
+    return LabelSync(requests.Session(), standin.base_url, **kwargs)
+
+
+def test_adds_missing_labels_in_one_post(standin):
+    page = standin.add_page("Flow A", "1", labels={"flow", "keep-me"})
+    added, removed = _sync(standin, remove_stale=False).sync(page["id"], ["Flow", "Sales", "record-triggered"])
+    assert added == {"sales", "record-triggered"}
+    assert removed == set()
+    assert page["labels"] == {"flow", "keep-me", "sales", "record-triggered"}
+    assert standin.stats["POST /wiki/rest/api/content/{id}/label"] == 1
+    assert not [k for k in standin.stats if k.startswith("DELETE")]
+
+
+def test_in_sync_page_sends_no_writes(standin):
+    page = standin.add_page("Flow B", "1", labels={"flow"})
+    assert _sync(standin, remove_stale=True).sync(page["id"], ["flow"]) == (set(), set())
+    assert not [k for k in standin.stats if k.startswith(("POST", "DELETE"))]
+
+
+def test_removes_stale_labels(standin):
+    page = standin.add_page("Flow C", "1", labels={"flow", "obsolete", "old-object"})
+    added, removed = _sync(standin, remove_stale=True).sync(page["id"], ["flow", "new"])
+    assert added == {"new"}
+    assert removed == {"obsolete", "old-object"}
+    assert page["labels"] == {"flow", "new"}
+
+
+def test_known_labels_skip_the_read(standin):
+    page = standin.add_page("Flow D", "1", labels={"flow"})
+    index = PageIndex(standin.base_url, None, "1", session=requests.Session())
+    index.set_labels(page["id"], {"flow"})
+    sync = _sync(standin, page_index=index, remove_stale=True)
+    sync.sync(page["id"], ["flow", "sales"])
+    assert standin.stats["GET /wiki/rest/api/content/{id}/label"] == 0
+    assert index.labels_for(page["id"]) == {"flow", "sales"}
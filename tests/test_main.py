@@ -0,0 +1,44 @@
+import pytest
+
+import config
+import main
+import mainflow
+
+
+@pytest.fixture
+def pipelines(monkeypatch):
+    """Replace the pipelines with stubs returning the given failed-item counts."""
+    monkeypatch.setenv("CONFLUENCE_DOMAIN", "http://127.0.0.1:9")
+    monkeypatch.setattr(config, "PAGE_INDEX", False, raising=False)
+    monkeypatch.setattr(config, "BODY_PREFETCH", False, raising=False)
+
+    def set_counts(mode, flows=0, objects=0):
+        monkeypatch.setattr(config, "SYNC_MODE", mode, raising=False)
+        monkeypatch.setattr(mainflow, "main", lambda **_: flows)
+        monkeypatch.setattr(main, "sync_flows", lambda *a, **k: flows)
+        monkeypatch.setattr(main, "sync_objects", lambda *a, **k: objects)
+    return set_counts
+
+
+@pytest.mark.parametrize("mode", ["FLOWS", "OBJECTS", "BOTH"])
+def test_clean_run_exits_zero(pipelines, mode):
+    pipelines(mode)
+    assert main.run([]) == 0
+
+
+@pytest.mark.parametrize("mode, flows, objects", [
+    ("FLOWS", 3, 0), ("OBJECTS", 0, 1), ("BOTH", 2, 0), ("BOTH", 0, 5),
+])
+def test_failed_items_exit_non_zero(pipelines, mode, flows, objects):
+    pipelines(mode, flows=flows, objects=objects)
+    assert main.run([]) == 1
+
+
+def test_raising_pipeline_exits_non_zero(pipelines, monkeypatch):
+    pipelines("BOTH")
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "sync_objects", broken)
+    assert main.run([]) == 1
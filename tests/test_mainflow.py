@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import config
+import mainflow
+from conftest import FLOW_DIR
+from body_prefetch import BodyPrefetcher
+from flow_confluence_client import FlowConfluenceUploader
+from flow_parser import parse_flow_file
+
+FOLDER = "50"
+
+
+@pytest.fixture
+def flow_files(tmp_path):
+    names = sorted(f for f in os.listdir(FLOW_DIR) if f.endswith(".flow-meta.xml"))[:5]
+    paths = []
+    for name in names:
+        shutil.copy(os.path.join(FLOW_DIR, name), tmp_path / name)
+        paths.append(str(tmp_path / name))
+    broken = tmp_path / "Broken.flow-meta.xml"
+    broken.write_text("<Flow><label>Broken", encoding="utf-8")
+    return paths + [str(broken)]
+
+
+@pytest.fixture
+def run_sync(standin, flow_files, monkeypatch):
+    """sync_flows against the stand-in, with retrieval replaced by the local files."""
+    monkeypatch.setenv("CONFLUENCE_DOMAIN", standin.base_url)
+    monkeypatch.setenv("CONFLUENCE_SPACE_ID", standin.space_id)
+    monkeypatch.setenv("FLOW_FOLDER", FOLDER)
+    monkeypatch.setenv("CONFLUENCE_EMAIL", "me")
+    monkeypatch.setenv("CONFLUENCE_API_TOKEN", "token")
+    monkeypatch.delenv("FLOWTEST", raising=False)
+    settings = {
+        "CONFLUENCE_BASE_URL": standin.base_url, "CONFLUENCE_SPACE_ID": standin.space_id,
+        "CONFLUENCE_EMAIL": "me", "CONFLUENCE_API_TOKEN": "token",
+        "INCREMENTAL_FLOWS": False, "RUN_JOURNAL": False, "SKIP_UNCHANGED": False,
+        "FLOW_PARSE_CACHE": False, "FLOW_PARSE_WORKERS": 0, "FLOW_UPLOAD_CONCURRENCY": 4,
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(config, name, value, raising=False)
+    monkeypatch.setattr(mainflow, "retrieve_flows", lambda watermark=None: list(flow_files))
+
+    def run(page_index=True, prefetch=True):
+        monkeypatch.setattr(config, "PAGE_INDEX", page_index, raising=False)
+        monkeypatch.setattr(config, "BODY_PREFETCH", prefetch, raising=False)
+        return mainflow.sync_flows()
+    return run
+
+
+@pytest.mark.parametrize("page_index, prefetch", [(True, True), (True, False), (False, False)])
+def test_failing_flows_do_not_stop_the_others(standin, flow_files, run_sync, monkeypatch,
+                                              page_index, prefetch):
+    flows = [parse_flow_file(f) for f in flow_files[:5]]
+    existing = standin.add_page(flows[0]["label"], FOLDER, "<p>Notes</p>")
+    failing = flows[1]["developerName"]
+    upload = FlowConfluenceUploader.upload_flow_doc
+
+    def flaky_upload(self, flow):
+        if flow["developerName"] == failing:
+            raise RuntimeError("boom")
+        return upload(self, flow)
+
+    monkeypatch.setattr(FlowConfluenceUploader, "upload_flow_doc", flaky_upload)
+    assert run_sync(page_index=page_index, prefetch=prefetch) == 2  # Broken + failing
+
+    titles = {p["title"] for p in standin.pages.values()}
+    assert titles == {flows[i]["label"] for i in (0, 2, 3, 4)}
+    assert existing["version"]["number"] == 2
+    assert existing["body"]["value"].startswith("<p>Notes</p>")
+    assert all("flow" in p["labels"] for p in standin.pages.values())
+    if prefetch:
+        # The existing page's body came from the bulk prefetch
+        assert standin.stats["GET /wiki/api/v2/pages"] == 1
+        assert standin.stats["GET /wiki/api/v2/pages/{id}"] == 0
+
+
+def test_only_changed_flows_are_prefetched(standin, flow_files, run_sync, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "STATE_DIR", str(tmp_path / "state"), raising=False)
+    monkeypatch.setattr(config, "SKIP_UNCHANGED", True, raising=False)
+    assert run_sync() == 1  # Broken
+    state = tmp_path / "state" / "flows_fingerprints.json"
+    digests = json.loads(state.read_text(encoding="utf-8"))
+    changed = sorted(digests)[0]
+    digests[changed] = "stale"
+    state.write_text(json.dumps(digests), encoding="utf-8")
+
+    planned = []
+    plan = BodyPrefetcher.plan
+
+    def spy(self, page_ids):
+        page_ids = list(page_ids)
+        planned.extend(page_ids)
+        return plan(self, page_ids)
+
+    monkeypatch.setattr(BodyPrefetcher, "plan", spy)
+    standin.stats.clear()
+    assert run_sync() == 1
+    assert planned == [standin.find(changed.split("/", 1)[1])["id"]]
+    assert standin.stats["GET /wiki/api/v2/pages"] == 1
+    assert standin.stats["PUT /wiki/api/v2/pages/{id}"] == 1
+    assert standin.stats["GET /wiki/api/v2/pages/{id}"] == 0
@@ -0,0 +1,82 @@
+import pytest
+import requests
+
+from body_prefetch import BodyPrefetcher
+from confluence_client import ConfluenceClient
+from fingerprint_store import FingerprintStore
+from object_uploader import ConfluenceObjectUploader
+from page_index import PageIndex
+
+PARENT = "600"
+FIELDS = [{"name": f"F{i}__c", "label": f"F{i}", "type": "picklist",
+           "picklistValues": [{"value": "a"}, {"value": "b"}]} for i in range(50)]
+META = {"name": "Big__c", "label": "Big", "fields": FIELDS,
+        "childRelationships": [{"childSObject": "Child__c", "field": "Big__c"}]}
+CHILDREN = {"Big__c - Fields", "Big__c - Picklist Values", "Big__c - Child Relationships"}
+
+
+@pytest.fixture
+def upload(standin, tmp_path):
+    client = ConfluenceClient(standin.base_url, "me", "token", standin.space_id, session=requests.Session())
+
+    def run(budget=1000, skip_unchanged=False):
+        fingerprints = FingerprintStore(str(tmp_path / "objects.json")) if skip_unchanged else None
+        uploader = ConfluenceObjectUploader(client, fingerprints=fingerprints, page_budget=budget)
+        standin.stats.clear()
+        uploader.upload_object_doc(PARENT, "Big__c", FIELDS, META)
+        uploader.save()
+        return {k: v for k, v in standin.stats.items() if not k.startswith("GET")}
+    return run
+
+
+def _titles(standin):
+    return {p["title"] for p in standin.pages.values()}
+
+
+def test_unchanged_split_object_costs_no_writes(standin, upload):
+    upload(skip_unchanged=True)
+    assert _titles(standin) == {"Big__c"} | CHILDREN
+    assert upload(skip_unchanged=True) == {}
+
+
+def test_without_skip_unchanged_children_are_rewritten(standin, upload):
+    upload()
+    fields = standin.find("Big__c - Fields")
+    fields["body"]["value"] = "{}"  # edited by hand
+    writes = upload()
+    assert writes["PUT /wiki/api/v2/pages/{id}"] == 4
+    assert fields["body"]["value"] != "{}"
+
+
+def test_children_are_trashed_when_the_object_fits_again(standin, upload):
+    upload(skip_unchanged=True)
+    upload(budget=0, skip_unchanged=True)
+    assert _titles(standin) == {"Big__c"}
+    upload(budget=1000)
+    upload(budget=0)
+    assert _titles(standin) == {"Big__c"}
+
+
+def test_only_changed_objects_are_prefetched(standin, tmp_path):
+    session = requests.Session()
+    index = PageIndex(standin.base_url, None, standin.space_id, session=session)
+    prefetcher = BodyPrefetcher(standin.base_url, None, "atlas_doc_format", session=session)
+    client = ConfluenceClient(standin.base_url, "me", "token", standin.space_id,
+                              session=session, page_index=index.load(), prefetcher=prefetcher)
+    fingerprints = FingerprintStore(str(tmp_path / "objects.json"))
+    objects = [{"name": name, "label": name, "fields": FIELDS[:3]} for name in ("A__c", "B__c")]
+    first = ConfluenceObjectUploader(client, fingerprints=fingerprints, page_budget=0)
+    for meta in objects:
+        first.upload_object_doc(PARENT, meta["name"], meta["fields"], meta)
+
+    objects[1] = dict(objects[1], fields=FIELDS[:4])
+    uploader = ConfluenceObjectUploader(client, fingerprints=fingerprints, page_budget=0)
+    uploader.plan_prefetch(PARENT, objects)
+    assert list(prefetcher._pending) == [standin.find("B__c")["id"]]
+    standin.stats.clear()
+    for meta in objects:
+        uploader.upload_object_doc(PARENT, meta["name"], meta["fields"], meta)
+    assert standin.stats["GET /wiki/api/v2/pages"] == 1
+    assert standin.stats["GET /wiki/rest/api/content/{id}"] == 0
+    assert standin.stats["PUT /wiki/api/v2/pages/{id}"] == 1
+    assert prefetcher.hits == 1
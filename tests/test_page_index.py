@@ -0,0 +1,65 @@
+import requests
+
+from confluence_client import ConfluenceClient
+from page_index import PageIndex
+
+SEARCH = "GET /wiki/api/v2/pages"
+
+
+def _index(standin, page_limit=None):
+    index = PageIndex(standin.base_url, None, standin.space_id, session=requests.Session())
+    if page_limit:
+        index.PAGE_LIMIT = page_limit
+    return index.load()
+
+
+def _client(standin, page_index=None):
+    return ConfluenceClient(standin.base_url, "me", "token", standin.space_id,
+                            session=requests.Session(), page_index=page_index)
+
+
+def test_load_pages_through_the_whole_space(standin):
+    flows = standin.add_page("Flows", None)
+    objects = standin.add_page("Objects", None)
+    standin.add_page("Flow A", flows["id"])
+    standin.add_page("Account", objects["id"])
+    nested = standin.add_page("Account — Fields", standin.find("Account")["id"])
+    index = _index(standin, page_limit=2)
+    assert len(index) == 5
+    assert standin.stats["GET /wiki/api/v2/spaces/{id}/pages"] == 3
+    assert index.covers()
+    ref = index.get("Account — Fields")
+    assert (ref.id, ref.parent_id, ref.version) == (nested["id"], nested["parentId"], 1)
+
+
+def test_hits_and_misses_need_no_search(standin):
+    page = standin.add_page("Flow A", "10")
+    client = _client(standin, _index(standin))
+    assert client.find_page_id("Flow A", "10") == page["id"]
+    assert client.find_page_id("Missing", "10") is None
+    assert standin.stats[SEARCH] == 0
+
+
+def test_page_under_another_parent_is_updated(standin):
+    page = standin.add_page("Account", "99", "<p>old</p>")  # moved by hand
+    client = _client(standin, _index(standin))
+    client.create_or_update_page("10", "Account", "<p>new</p>", representation="storage")
+    assert len(standin.pages) == 1
+    assert page["version"]["number"] == 2
+    assert page["body"]["value"] == "<p>new</p>"
+
+
+def test_created_pages_are_indexed(standin):
+    index = _index(standin)
+    client = _client(standin, index)
+    created = client.create_page("10", "Contact", "<p/>", representation="storage")
+    assert index.get("Contact").id == created["id"]
+    client.update_page(created["id"], "Contact", "<p>v2</p>", representation="storage", version=1)
+    assert index.get("Contact").version == 2
+
+
+def test_without_an_index_the_title_is_searched(standin):
+    page = standin.add_page("Flow A", "10")
+    client = _client(standin, PageIndex(standin.base_url, None, standin.space_id))
+    assert client.find_page_id("Flow A", "10") == page["id"]
+    assert standin.stats[SEARCH] == 1
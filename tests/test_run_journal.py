@@ -0,0 +1,91 @@
+import json
+
+from run_journal import RunJournal
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_fresh_run_truncates_previous_journal(tmp_path):
+    path = str(tmp_path / "flows_journal.jsonl")
+    journal = RunJournal(path)
+    journal.record("A", "uploaded", page_id=1, version=2)
+    journal.finish(complete=False)
+
+    journal = RunJournal(path)
+    assert not journal.resumed
+    assert not journal.has("A", "uploaded")
+    journal.finish(complete=False)
+    assert [r.get("event") for r in _lines(path)] == ["start"]
+
+
+def test_resume_skips_completed_items(tmp_path):
+    path = str(tmp_path / "flows_journal.jsonl")
+    journal = RunJournal(path)
+    journal.record("A", "fetched", file="a.flow-meta.xml")
+    journal.record("A", "uploaded", page_id=10, version=3)
+    journal.record("A", "labelled", page_id=10)
+    journal.record("B", "uploaded", page_id=11, version=1)
+    journal.finish(complete=False)
+
+    journal = RunJournal(path, resume=True)
+    assert journal.resumed
+    assert journal.done("A")
+    assert not journal.done("B")
+    assert journal.has("B", "uploaded")
+    assert journal.get("A", "page_id") == "10"
+    assert journal.get("A", "version") == 3
+    assert journal.items_at("fetched")["A"]["file"] == "a.flow-meta.xml"
+    journal.finish(complete=False)
+
+
+def test_final_stage_is_per_journal(tmp_path):
+    journal = RunJournal(str(tmp_path / "objects_journal.jsonl"), final_stage="uploaded")
+    journal.record("Account", "uploaded", page_id=5)
+    assert journal.done("Account")
+    journal.finish(complete=False)
+
+
+def test_resume_ignores_torn_last_line(tmp_path):
+    path = tmp_path / "flows_journal.jsonl"
+    journal = RunJournal(str(path))
+    journal.record("A", "labelled", page_id=1)
+    journal.finish(complete=False)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"item": "B", "stage": "lab')  # killed mid-write
+
+    journal = RunJournal(str(path), resume=True)
+    assert journal.done("A")
+    assert not journal.has("B", "labelled")
+    journal.record("B", "labelled", page_id=2)
+    journal.finish(complete=False)
+
+    # The torn line stays on its own line; everything after it parses
+    raw = path.read_text(encoding="utf-8").splitlines()
+    assert '{"item": "B", "stage": "lab' in raw
+    assert json.loads(raw[-1])["item"] == "B"
+    journal = RunJournal(str(path), resume=True)
+    assert journal.done("A") and journal.done("B")
+    journal.finish(complete=False)
+
+
+def test_finished_journal_starts_over(tmp_path):
+    path = str(tmp_path / "flows_journal.jsonl")
+    journal = RunJournal(path)
+    journal.record("A", "labelled", page_id=1)
+    journal.finish(complete=True)
+    assert _lines(path)[-1]["event"] == "finished"
+
+    journal = RunJournal(path, resume=True)
+    assert not journal.resumed
+    assert not journal.done("A")
+    journal.finish(complete=False)
+    assert [r.get("event") for r in _lines(path)] == ["start"]
+
+
+def test_resume_without_journal_is_a_full_run(tmp_path):
+    journal = RunJournal(str(tmp_path / "state" / "flows_journal.jsonl"), resume=True)
+    assert not journal.resumed
+    journal.finish(complete=False)
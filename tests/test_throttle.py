@@ -0,0 +1,98 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import throttle
+from http_session import PooledAdapter
+from throttle import TokenBucket, backoff_delay, near_limit, server_delay
+
+
+def _response(**headers):
+    return SimpleNamespace(headers=CaseInsensitiveDict(headers))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(throttle.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(throttle.time, "sleep", sleep)
+    return now, slept
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    now, slept = clock
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    now[0] += 10  # refills, but never beyond the burst
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() > 0
+
+
+def test_pause_blocks_even_without_a_rate(clock):
+    now, slept = clock
+    bucket = TokenBucket(rate=0)
+    assert bucket.acquire() == 0.0
+    bucket.pause(4)
+    assert bucket.acquire() == pytest.approx(4)
+    assert bucket.acquire() == 0.0
+
+
+def test_server_delay_formats():
+    assert server_delay(_response(**{"Retry-After": "7"})) == 7
+    assert server_delay(_response(**{"Retry-After": "100000"})) == throttle.MAX_SERVER_DELAY
+    http_date = formatdate(time.time() + 30, usegmt=True)
+    assert 25 < server_delay(_response(**{"Retry-After": http_date})) <= 30
+    assert 55 < server_delay(_response(**{"X-RateLimit-Reset": str(time.time() + 60)})) <= 60
+    assert server_delay(_response(**{"X-RateLimit-Reset": "2000-01-01T00:00:00Z"})) == 0.0
+    assert server_delay(_response()) is None
+    assert server_delay(_response(**{"Retry-After": "soon"})) is None
+
+
+def test_near_limit():
+    assert near_limit(_response(**{"X-RateLimit-NearLimit": "true"}))
+    assert near_limit(_response(**{"X-RateLimit-Remaining": "0"}))
+    assert not near_limit(_response(**{"X-RateLimit-Remaining": "12"}))
+
+
+def test_backoff_is_capped():
+    for attempt in range(1, 12):
+        assert 0 <= backoff_delay(attempt, 0.5, 3) <= min(3, 0.5 * 2 ** (attempt - 1))
+
+
+def _session(**kwargs):
+    session = requests.Session()
+    session.mount("http://", PooledAdapter(timeout=5, rate_limit=0, backoff_base=0, backoff_max=0, **kwargs))
+    return session
+
+
+def test_429_is_retried_for_post(standin):
+    standin.throttle_rate = 0.5
+    standin.retry_after = 0
+    session = _session(retries=20)
+    for i in range(10):
+        r = session.post(f"{standin.base_url}/wiki/api/v2/pages",
+                         json={"title": f"P{i}", "parentId": "1", "body": {"value": ""}})
+        assert r.status_code == 200
+    assert len(standin.pages) == 10
+    assert session.get_adapter("http://").counters["throttled"] == standin.stats["429"] > 0
+
+
+def test_gives_up_after_max_retries(standin):
+    standin.throttle_rate = 1.0
+    standin.retry_after = 0
+    session = _session(retries=2)
+    r = session.get(f"{standin.base_url}/wiki/api/v2/pages")
+    assert r.status_code == 429
+    assert standin.stats["429"] == 3
+    assert session.get_adapter("http://").counters["gave_up"] == 1
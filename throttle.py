@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Never sleep longer than this on a single server-provided hint
+MAX_SERVER_DELAY = 300.0
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() takes one token, sleeping until it is
+    available; pause() blocks every caller until a deadline (used when the
+    server says to back off, so all workers slow down, not just the one that
+    got the 429).
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate or 0)
+        self.burst = float(burst or max(self.rate, 1))
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token; returns the seconds spent waiting."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._blocked_until - now, 0.0)
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def backoff_delay(attempt, base, cap):
+    """Exponential backoff with full jitter (attempt starts at 1)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def server_delay(response):
+    """
+    Seconds the server asked us to wait, from Retry-After (seconds or HTTP
+    date) or X-RateLimit-Reset (ISO timestamp or epoch seconds). None if absent.
+    """
+    headers = response.headers
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        delay = _seconds_until(retry_after)
+        if delay is not None:
+            return min(delay, MAX_SERVER_DELAY)
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        delay = _seconds_until(reset)
+        if delay is not None:
+            return min(delay, MAX_SERVER_DELAY)
+    return None
+
+
+def near_limit(response):
+    """True when the server reports the rate-limit budget is (nearly) spent."""
+    headers = response.headers
+    if headers.get("X-RateLimit-NearLimit", "").lower() == "true":
+        return True
+    return headers.get("X-RateLimit-Remaining", "").strip() == "0"
+
+
+def _seconds_until(value):
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is not None:
+        # Large numbers are epoch timestamps, small ones are delays
+        return max(number - time.time(), 0.0) if number > 1e9 else max(number, 0.0)
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
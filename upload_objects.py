@@ -1,9 +1,11 @@
+import argparse
 import logging
 import os
 from datetime import datetime
 
 import config
 import object_loader
+import profiling
 from confluence_client import ConfluenceClient
 from confluence_uploader import ConfluenceUploader
 
@@ -19,7 +21,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run():
+def run(profile=False):
+    with profiling.session("upload_objects", enabled=profile):
+        _sync_objects()
+
+
+def _sync_objects():
     logger.info("Using Confluence Base URL: %s", config.CONFLUENCE_BASE_URL)
 
     # Initialize Confluence client + uploader
@@ -33,6 +40,7 @@ def run():
     # Fetch objects from Salesforce
     objects = object_loader.fetch_objects()
     logger.info("Fetched %d objects from Salesforce", len(objects))
+    profiling.checkpoint("after_retrieve")
 
     for obj in objects:
         try:
@@ -97,7 +105,11 @@ def run():
 
         except Exception as e:
             logger.error("Error processing object %s: %s", obj.get("name"), str(e))
+    profiling.checkpoint("after_upload")
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Upload Salesforce object pages to Confluence")
+    parser.add_argument("--profile", action="store_true",
+                        help="write cProfile and tracemalloc reports for this run to the logs folder")
+    run(profile=parser.parse_args().profile)
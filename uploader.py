@@ -1,6 +1,7 @@
-import requests
 import logging
 import config
+from http_session import get_session
+from labels import LabelSync
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +17,21 @@ def sanitize_label(label: str) -> str:
     return clean.strip("-")
 
 class ConfluenceUploader:
-    def __init__(self):
+    def __init__(self, session=None, page_index=None):
+        self.session = session or get_session()
+        self.page_index = page_index
         self.base_url = f"{config.CONFLUENCE_BASE_URL}/wiki/api/v2/pages"
+        self.labels = LabelSync(self.session, config.CONFLUENCE_BASE_URL,
+                                headers=auth_headers(), page_index=page_index)
 
     def find_page_by_title(self, title, parent_id):
+        if self.page_index is not None and self.page_index.covers():
+            ref = self.page_index.get(title)
+            return self.page_index.as_page(ref) if ref else None
+
         url = f"{self.base_url}?spaceId={config.CONFLUENCE_SPACE_ID}&title={title}&parentId={parent_id}"
         logger.debug("find_page_by_title URL: %s", url)
-        resp = requests.get(url, headers=auth_headers())
+        resp = self.session.get(url, headers=auth_headers())
         resp.raise_for_status()
         results = resp.json().get("results", [])
         return results[0] if results else None
@@ -36,9 +45,9 @@ class ConfluenceUploader:
             "body": {"representation": "storage", "value": body},
         }
         logger.debug("Creating page under parent %s: %s", parent_id, payload["title"])
-        resp = requests.post(self.base_url, headers=auth_headers(), json=payload)
+        resp = self.session.post(self.base_url, headers=auth_headers(), json=payload)
         resp.raise_for_status()
-        return resp.json()
+        return self._remember(resp.json(), parent_id)
 
     def update_page(self, page, body):
         payload = {
@@ -51,21 +60,22 @@ class ConfluenceUploader:
             "body": {"representation": "storage", "value": body},
         }
         logger.debug("Updating page under parent %s: %s", page["parentId"], page["title"])
-        resp = requests.put(f"{self.base_url}/{page['id']}", headers=auth_headers(), json=payload)
+        resp = self.session.put(f"{self.base_url}/{page['id']}", headers=auth_headers(), json=payload)
         resp.raise_for_status()
-        return resp.json()
+        return self._remember(resp.json(), page["parentId"])
+
+    def _remember(self, page, parent_id=None):
+        if self.page_index is not None:
+            self.page_index.update_from_response(page, parent_id)
+        return page
 
-    def add_labels(self, page_id, labels):
-        clean_labels = [{"prefix": "global", "name": sanitize_label(l)} for l in labels if l]
-        if not clean_labels:
+    def add_labels(self, page_id, labels, current=None):
+        clean = {sanitize_label(l) for l in labels if l}
+        clean.discard("")
+        if not clean:
             return
-        url = f"{config.CONFLUENCE_BASE_URL}/wiki/rest/api/content/{page_id}/label"
-        logger.debug("Adding labels to page %s via v1: %s", page_id, clean_labels)
-        resp = requests.post(url, headers=auth_headers(), json=clean_labels)
-        if resp.status_code not in (200, 204):
-            logger.warning("⚠ Failed to add labels to page %s - %s", page_id, resp.text)
-        else:
-            logger.info(" Labels added to page %s", page_id)
+        logger.debug("Syncing labels on page %s via v1: %s", page_id, sorted(clean))
+        self.labels.sync(page_id, clean, current=current)
 
     def upload_flow_doc(self, flow_name, status, description, use_case, fields, parent_id):
         title = flow_name
@@ -92,7 +102,7 @@ class ConfluenceUploader:
             result = self.create_page(title, body, parent_id)
 
         labels = ["Flow-Documentation", flow_name] + (fields.split(",") if fields else [])
-        self.add_labels(result["id"], labels)
+        self.add_labels(result["id"], labels, current=None if page else set())
         return result
 
     def upload_object_doc(self, object_name, label, description, fields, parent_id):
@@ -114,5 +124,5 @@ class ConfluenceUploader:
             result = self.create_page(title, body, parent_id)
 
         labels = ["Flow-Documentation", object_name] + (fields if isinstance(fields, list) else [])
-        self.add_labels(result["id"], labels)
+        self.add_labels(result["id"], labels, current=None if page else set())
         return result